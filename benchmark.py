@@ -0,0 +1,411 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import weather_app
+
+BASE_DATE = datetime(2024, 1, 1)
+SEED_CHUNK = 10000
+MONGOMOCK_UNSUPPORTED = {
+    "temperatures_stats": "$dateTrunc nu este suportat de mongomock",
+    "temperatures_summary": "TemperatureRollups nu poate fi construită cu mongomock",
+}
+
+class InProcessClient:
+    def __init__(self):
+        self.local = threading.local()
+
+    def request(self, method, path, body):
+        if not hasattr(self.local, "client"):
+            self.local.client = weather_app.app.test_client()
+        response = self.local.client.open(path, method=method, json=body)
+        response.get_data()
+        return response.status_code
+
+class HttpClient:
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+
+    def request(self, method, path, body):
+        data = None
+        headers = {}
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        http_request = urllib.request.Request(self.url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(http_request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+class IdPool:
+    def __init__(self, ids):
+        self.ids = list(ids)
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            return self.ids.pop() if self.ids else None
+
+def connect(args):
+    weather_app.database_name = args.database
+    if args.mongomock:
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit("mongomock nu este instalat: pip install mongomock")
+        weather_app.client = mongomock.MongoClient()
+        weather_app.db = weather_app.client[args.database]
+    else:
+        weather_app.connect()
+    if args.drop:
+        weather_app.client.drop_database(args.database)
+    elif any(weather_app.db[name].estimated_document_count() for name in weather_app.db.list_collection_names()):
+        sys.exit(f"Baza '{args.database}' nu este goală; folosiți --drop pentru a o șterge înainte de populare.")
+    weather_app.initialize_database()
+
+def insert_chunked(collection, documents):
+    chunk = []
+    for document in documents:
+        chunk.append(document)
+        if len(chunk) == SEED_CHUNK:
+            weather_app.db[collection].insert_many(chunk, ordered=False)
+            chunk = []
+    if chunk:
+        weather_app.db[collection].insert_many(chunk, ordered=False)
+
+def seed(args, rng):
+    countries = args.countries + args.requests
+    cities = args.cities + args.requests
+    readings = args.readings + args.requests
+
+    def country_documents():
+        for id in range(1, countries + 1):
+            yield {
+                "id": id,
+                "nume_tara": f"Tara {id}",
+                "latitudine": rng.uniform(-90, 90),
+                "longitudine": rng.uniform(-180, 180),
+            }
+
+    def city_documents():
+        for id in range(1, cities + 1):
+            lat = rng.uniform(-90, 90)
+            lon = rng.uniform(-180, 180)
+            yield {
+                "id": id,
+                "id_tara": (id - 1) % args.countries + 1,
+                "nume_oras": f"Oras {id}",
+                "latitudine": lat,
+                "longitudine": lon,
+                "locatie": weather_app.geo_point(lat, lon),
+            }
+
+    def temperature_documents():
+        for id in range(1, readings + 1):
+            yield {
+                "id": id,
+                "valoare": round(rng.uniform(-30, 40), 1),
+                "timestamp": BASE_DATE + timedelta(hours=(id - 1) // args.cities),
+                "id_oras": (id - 1) % args.cities + 1,
+            }
+
+    started = time.perf_counter()
+    insert_chunked("Tari", country_documents())
+    insert_chunked("Orase", city_documents())
+    insert_chunked("Temperaturi", temperature_documents())
+    for name, seq in (("Tari", countries), ("Orase", cities), ("Temperaturi", readings)):
+        weather_app.db["counters"].update_one({"_id": name}, {"$set": {"seq": seq}}, upsert=True)
+    rollups = not args.mongomock
+    if rollups:
+        try:
+            weather_app.rebuild_rollups()
+        except Exception as e:
+            print(f"TemperatureRollups nu a putut fi construită: {e}", file=sys.stderr)
+            rollups = False
+
+    return {
+        "seconds": time.perf_counter() - started,
+        "rollups": rollups,
+        "disposable_countries": IdPool(range(args.countries + 1, countries + 1)),
+        "disposable_cities": IdPool(range(args.cities + 1, cities + 1)),
+        "disposable_temperatures": IdPool(range(args.readings + 1, readings + 1)),
+        "hours": max(1, args.readings // args.cities),
+        "counter": IdPool(range(args.requests * len(SCENARIOS), 0, -1)),
+    }
+
+def date_range(args, rng, state):
+    start = BASE_DATE + timedelta(hours=rng.randrange(state["hours"]))
+    until = start + timedelta(days=args.range_days)
+    return f"from={start:%Y-%m-%d}&until={until:%Y-%m-%d}"
+
+def scenario_countries_get(args, rng, state):
+    return "GET", "/api/countries", None
+
+def scenario_countries_post(args, rng, state):
+    return "POST", "/api/countries", {"nume": f"Bench {state['counter'].take()}", "lat": 1.0, "lon": 2.0}
+
+def scenario_countries_put(args, rng, state):
+    id = rng.randint(1, args.countries)
+    return "PUT", f"/api/countries/{id}", {"id": id, "nume": f"Bench {state['counter'].take()}", "lat": 1.0, "lon": 2.0}
+
+def scenario_countries_delete(args, rng, state):
+    return "DELETE", f"/api/countries/{state['disposable_countries'].take()}", None
+
+def scenario_cities_get(args, rng, state):
+    return "GET", "/api/cities", None
+
+def scenario_cities_by_country(args, rng, state):
+    return "GET", f"/api/cities/country/{rng.randint(1, args.countries)}", None
+
+def scenario_cities_post(args, rng, state):
+    body = {"idTara": rng.randint(1, args.countries), "nume": f"Bench {state['counter'].take()}", "lat": 1.0, "lon": 2.0}
+    return "POST", "/api/cities", body
+
+def scenario_cities_put(args, rng, state):
+    id = rng.randint(1, args.cities)
+    body = {"id": id, "idTara": (id - 1) % args.countries + 1, "nume": f"Bench {state['counter'].take()}", "lat": 1.0, "lon": 2.0}
+    return "PUT", f"/api/cities/{id}", body
+
+def scenario_cities_delete(args, rng, state):
+    return "DELETE", f"/api/cities/{state['disposable_cities'].take()}", None
+
+def scenario_temperatures_get(args, rng, state):
+    return "GET", f"/api/temperatures?{date_range(args, rng, state)}", None
+
+def scenario_temperatures_by_city(args, rng, state):
+    return "GET", f"/api/temperatures/cities/{rng.randint(1, args.cities)}?{date_range(args, rng, state)}", None
+
+def scenario_temperatures_by_country(args, rng, state):
+    return "GET", f"/api/temperatures/countries/{rng.randint(1, args.countries)}?{date_range(args, rng, state)}", None
+
+def scenario_temperatures_stats(args, rng, state):
+    return "GET", f"/api/temperatures/stats?cityId={rng.randint(1, args.cities)}&bucket=day", None
+
+def scenario_temperatures_summary(args, rng, state):
+    return "GET", f"/api/temperatures/summary?cityId={rng.randint(1, args.cities)}&bucket=day", None
+
+def scenario_temperatures_export(args, rng, state):
+    format = rng.choice(["csv", "arrow", "parquet"])
+    return "GET", f"/api/temperatures/export?cityId={rng.randint(1, args.cities)}&format={format}", None
+
+def scenario_temperatures_post(args, rng, state):
+    return "POST", "/api/temperatures", {"idOras": rng.randint(1, args.cities), "valoare": rng.uniform(-30, 40)}
+
+def scenario_temperatures_batch(args, rng, state):
+    body = [{"idOras": rng.randint(1, args.cities), "valoare": rng.uniform(-30, 40)} for _ in range(args.batch_size)]
+    return "POST", "/api/temperatures/batch", body
+
+def scenario_temperatures_put(args, rng, state):
+    id = rng.randint(1, args.readings)
+    return "PUT", f"/api/temperatures/{id}", {"id": id, "idOras": (id - 1) % args.cities + 1, "valoare": rng.uniform(-30, 40)}
+
+def scenario_temperatures_delete(args, rng, state):
+    return "DELETE", f"/api/temperatures/{state['disposable_temperatures'].take()}", None
+
+SCENARIOS = {
+    "countries_get": scenario_countries_get,
+    "countries_post": scenario_countries_post,
+    "countries_put": scenario_countries_put,
+    "countries_delete": scenario_countries_delete,
+    "cities_get": scenario_cities_get,
+    "cities_by_country": scenario_cities_by_country,
+    "cities_post": scenario_cities_post,
+    "cities_put": scenario_cities_put,
+    "cities_delete": scenario_cities_delete,
+    "temperatures_get": scenario_temperatures_get,
+    "temperatures_by_city": scenario_temperatures_by_city,
+    "temperatures_by_country": scenario_temperatures_by_country,
+    "temperatures_stats": scenario_temperatures_stats,
+    "temperatures_summary": scenario_temperatures_summary,
+    "temperatures_export": scenario_temperatures_export,
+    "temperatures_post": scenario_temperatures_post,
+    "temperatures_batch": scenario_temperatures_batch,
+    "temperatures_put": scenario_temperatures_put,
+    "temperatures_delete": scenario_temperatures_delete,
+}
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def unsupported_reason(name, args, state):
+    if args.mongomock and name in MONGOMOCK_UNSUPPORTED:
+        return MONGOMOCK_UNSUPPORTED[name]
+    if name == "temperatures_summary" and not state["rollups"]:
+        return "TemperatureRollups nu a putut fi construită"
+    return None
+
+def run_scenario(name, args, client, state):
+    scenario = SCENARIOS[name]
+    rng = random.Random(f"{args.seed}-{name}")
+    requests = [scenario(args, rng, state) for _ in range(args.requests)]
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def send(method_path_body):
+        method, path, body = method_path_body
+        started = time.perf_counter()
+        try:
+            status = client.request(method, path, body)
+        except Exception:
+            status = 0
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(send, requests))
+    duration = time.perf_counter() - started
+
+    errors = sum(count for status, count in statuses.items() if status == 0 or status >= 400)
+    result = {
+        "requests": len(requests),
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+    result.update(summarize(latencies, duration))
+    return result
+
+def summarize(latencies, duration):
+    latencies = sorted(latencies)
+    return {
+        "duration_s": duration,
+        "throughput_rps": len(latencies) / duration if duration else None,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else None,
+        },
+    }
+
+def run_allocator(mode, args):
+    allocator = weather_app.create_id_allocator(mode)
+    latencies = []
+    ids = []
+    lock = threading.Lock()
+
+    def allocate(_):
+        started = time.perf_counter()
+        id = allocator.allocate("bench_ids", 1)[0]
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed * 1000)
+            ids.append(id)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(allocate, range(args.allocator_ids)))
+    duration = time.perf_counter() - started
+
+    result = {"ids": len(ids), "duplicates": len(ids) - len(set(ids))}
+    result.update(summarize(latencies, duration))
+    return result
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark pentru rutele din weather_app.")
+    parser.add_argument("--countries", type=int, default=100)
+    parser.add_argument("--cities", type=int, default=1000)
+    parser.add_argument("--readings", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=200, help="cereri per scenariu")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=100, help="temperaturi per cerere batch")
+    parser.add_argument("--range-days", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--database",
+        help="baza de date populată; implicit weather_bench, obligatorie cu --url "
+             "(serverul trebuie să ruleze cu MONGO_DB egal cu această bază)"
+    )
+    parser.add_argument("--drop", action="store_true", help="șterge baza de date înainte de populare")
+    parser.add_argument(
+        "--allow-app-database", action="store_true",
+        help="permite popularea bazei MONGO_DB folosite de aplicație"
+    )
+    parser.add_argument("--mongomock", action="store_true", help="folosește mongomock în loc de mongod")
+    parser.add_argument("--url", help="trimite cererile prin HTTP către un server pornit")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--allocators", action="store_true", help="compară alocatoarele de id-uri")
+    parser.add_argument("--allocator-ids", type=int, default=5000, help="id-uri alocate per alocator")
+    parser.add_argument("--output", help="fișierul JSON cu rezultatele (implicit stdout)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Scenarii necunoscute: {', '.join(unknown)}")
+    if args.url and args.mongomock:
+        sys.exit("--url nu poate fi folosit împreună cu --mongomock")
+
+    if args.database is None:
+        if args.url:
+            sys.exit("--database este obligatoriu împreună cu --url")
+        args.database = "weather_bench"
+    if args.database == weather_app.database_name and not args.mongomock and not args.allow_app_database:
+        sys.exit(
+            f"'{args.database}' este baza MONGO_DB a aplicației; folosiți altă bază "
+            f"sau --allow-app-database dacă doriți într-adevăr să o populați."
+        )
+    if args.url:
+        print(
+            f"Datele sunt scrise în baza '{args.database}'; serverul de la {args.url} "
+            f"trebuie să ruleze cu MONGO_DB={args.database} și același MONGO_HOST/MONGO_PORT.",
+            file=sys.stderr
+        )
+
+    rng = random.Random(args.seed)
+    connect(args)
+    state = seed(args, rng)
+    client = HttpClient(args.url) if args.url else InProcessClient()
+
+    report = {
+        "started": datetime.now().isoformat(),
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("output", "scenarios")
+        },
+        "seed_s": state["seconds"],
+        "scenarios": {},
+    }
+    for name in names:
+        reason = unsupported_reason(name, args, state)
+        if reason is not None:
+            report["scenarios"][name] = {"skipped": reason}
+            print(f"{name}: omis ({reason})", file=sys.stderr)
+            continue
+        report["scenarios"][name] = run_scenario(name, args, client, state)
+        print(f"{name}: {report['scenarios'][name]['throughput_rps']:.1f} req/s", file=sys.stderr)
+
+    if args.allocators:
+        report["allocators"] = {}
+        for mode in ("counter", "block", "time"):
+            report["allocators"][mode] = run_allocator(mode, args)
+            print(f"allocator {mode}: {report['allocators'][mode]['throughput_rps']:.1f} id/s", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
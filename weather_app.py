@@ -1,7 +1,28 @@
-from flask import Flask, request, Response, jsonify
-from pymongo import MongoClient, ASCENDING
-from datetime import datetime
+from flask import Flask, request, Response, jsonify, stream_with_context, g, make_response
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+import click
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+from pymongo import MongoClient, ASCENDING, GEOSPHERE, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+import pyarrow
+import pyarrow.parquet
+import atexit
+import csv
+import decimal
+import functools
+import hashlib
+import io
+import json
+import orjson
 import os
+import queue
+import socket
+import threading
+import time
+import uuid
 
 app = Flask(__name__)
 username = os.environ.get("MONGO_USERNAME", "default_user")
@@ -11,19 +32,721 @@ port = os.environ.get("MONGO_PORT", "27017")
 database_name = os.environ.get("MONGO_DB", "weather_db")
 
 uri = f"mongodb://{username}:{password}@{host}:{port}/"
+max_pool_size = int(os.environ.get("MONGO_MAX_POOL_SIZE", "100"))
+min_pool_size = int(os.environ.get("MONGO_MIN_POOL_SIZE", "0"))
+wait_queue_timeout_ms = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+server_selection_timeout_ms = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+
+batch_max_size = int(os.environ.get("BATCH_MAX_SIZE", "10000"))
+stream_batch_size = int(os.environ.get("STREAM_BATCH_SIZE", "1000"))
+page_max_limit = int(os.environ.get("PAGE_MAX_LIMIT", "1000"))
+metadata_cache_size = int(os.environ.get("METADATA_CACHE_SIZE", "10000"))
+metadata_cache_ttl = float(os.environ.get("METADATA_CACHE_TTL", "60"))
+write_behind_enabled = os.environ.get("WRITE_BEHIND", "0") == "1"
+write_behind_queue_size = int(os.environ.get("WRITE_BEHIND_QUEUE_SIZE", "10000"))
+write_behind_batch_size = int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", "500"))
+write_behind_interval = float(os.environ.get("WRITE_BEHIND_INTERVAL", "1.0"))
+write_behind_max_attempts = int(os.environ.get("WRITE_BEHIND_MAX_ATTEMPTS", "8"))
+write_behind_retry_backoff = float(os.environ.get("WRITE_BEHIND_RETRY_BACKOFF", "0.5"))
+cascade_batch_size = int(os.environ.get("CASCADE_BATCH_SIZE", "10000"))
+cascade_stale_after = float(os.environ.get("CASCADE_STALE_AFTER", "300"))
+cascade_heartbeat_interval = float(os.environ.get("CASCADE_HEARTBEAT", "30"))
+cascade_sweep_interval = float(os.environ.get("CASCADE_SWEEP_INTERVAL", "30"))
+cascade_retry_after = float(os.environ.get("CASCADE_RETRY_AFTER", "60"))
+temperatures_storage = os.environ.get("TEMPERATURES_STORAGE", "regular")
+slow_request_ms = float(os.environ.get("SLOW_REQUEST_MS", "0"))
+slow_request_queue_size = int(os.environ.get("SLOW_REQUEST_QUEUE_SIZE", "100"))
+version_cache_ttl = float(os.environ.get("VERSION_CACHE_TTL", "1"))
+historical_max_age = int(os.environ.get("HISTORICAL_MAX_AGE", "86400"))
+id_allocator_mode = os.environ.get("ID_ALLOCATOR", "counter")
+id_block_size = int(os.environ.get("ID_BLOCK_SIZE", "1000"))
+id_worker_lease_ttl = float(os.environ.get("ID_WORKER_LEASE_TTL", "60"))
+export_batch_size = int(os.environ.get("EXPORT_BATCH_SIZE", "10000"))
+json_datetime_format = os.environ.get("JSON_DATETIME_FORMAT", "http")
+feed_queue_size = int(os.environ.get("FEED_QUEUE_SIZE", "1000"))
+feed_heartbeat = float(os.environ.get("FEED_HEARTBEAT", "15"))
+feed_catchup_max = int(os.environ.get("FEED_CATCHUP_MAX", "10000"))
+feed_retry_interval = float(os.environ.get("FEED_RETRY_INTERVAL", "1.0"))
+feed_max_subscribers = int(os.environ.get("FEED_MAX_SUBSCRIBERS", "2"))
+
+COUNTRY_FIELDS = {"id": "id", "nume": "nume_tara", "lat": "latitudine", "lon": "longitudine"}
+CITY_FIELDS = {"id": "id", "idTara": "id_tara", "nume": "nume_oras", "lat": "latitudine", "lon": "longitudine"}
+TEMPERATURE_FIELDS = {"id": "id", "valoare": "valoare", "timestamp": "timestamp"}
+STATS_BUCKETS = ("hour", "day", "month")
+ROLLUP_GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+FEED_PIPELINE = [
+    {"$match": {"operationType": "insert"}},
+    {"$project": {"fullDocument.id": 1, "fullDocument.id_oras": 1, "fullDocument.valoare": 1, "fullDocument.timestamp": 1}},
+]
+FEED_RESET = {"id": None, "event": "reset", "data": "{}"}
+CHANGE_STREAM_HISTORY_LOST = 286
+EXPORT_SCHEMA = pyarrow.schema([
+    ("id_oras", pyarrow.int64()),
+    ("timestamp", pyarrow.timestamp("ms")),
+    ("valoare", pyarrow.float64()),
+])
+TIMESERIES_OPTIONS = {"timeField": "timestamp", "metaField": "id_oras", "granularity": "hours"}
+EXPLAINABLE_COMMANDS = ("find", "aggregate", "count", "distinct", "delete", "update", "findAndModify")
+EXPLAIN_EXCLUDED_FIELDS = ("lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern")
+
+REQUEST_DURATION = Histogram(
+    "weather_http_request_duration_seconds", "Durata cererilor HTTP.", ["route", "method", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "weather_http_requests_in_flight", "Cereri HTTP în curs.", ["route", "method"], multiprocess_mode="livesum"
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "weather_mongo_command_duration_seconds", "Durata comenzilor MongoDB.", ["collection", "command", "outcome"]
+)
+MONGO_DOCUMENTS_RETURNED = Counter(
+    "weather_mongo_documents_returned_total", "Documente returnate de MongoDB.", ["collection", "command"]
+)
+
+def json_default(value):
+    if isinstance(value, date):
+        return http_date(value)
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if hasattr(value, "__html__"):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class OrjsonProvider(JSONProvider):
+    mimetype = "application/json"
+
+    def __init__(self, app, datetime_format="http"):
+        super().__init__(app)
+        self.option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        if datetime_format == "http":
+            self.option |= orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps_bytes(self, obj):
+        return orjson.dumps(obj, default=json_default, option=self.option)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault("default", json_default)
+            return json.dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+app.json = OrjsonProvider(app, json_datetime_format)
+
+client = None
+db = None
+transactions_available = None
+
+class MetadataCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key, stamp=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > time.monotonic() and entry[2] == stamp:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+            self.misses += 1
+            return False, None
+
+    def store(self, key, value, stamp=None):
+        if not value:
+            return
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl, stamp)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get(self, key, loader, stamp=None):
+        found, value = self.lookup(key, stamp)
+        if found:
+            return value
+        value = loader()
+        self.store(key, value, stamp)
+        return value
+
+    def invalidate(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "maxSize": self.max_size}
+
+metadata_cache = MetadataCache(metadata_cache_size, metadata_cache_ttl)
+
+def geo_point(lat, lon):
+    return {"type": "Point", "coordinates": [lon, lat]}
+
+def valid_coordinates(lat, lon):
+    return -90 <= lat <= 90 and -180 <= lon <= 180
+
+def parse_near(value):
+    try:
+        lat, lon = (float(part) for part in value.split(","))
+    except ValueError:
+        raise QueryError("Parametrul 'near' trebuie să fie de forma lat,lon.")
+    if not valid_coordinates(lat, lon):
+        raise QueryError("Coordonatele sunt în afara intervalului valid.")
+    return lat, lon
+
+def find_nearby_city_ids(lat, lon, radius_km, nearest):
+    geo_near = {
+        "near": geo_point(lat, lon),
+        "distanceField": "distanta",
+        "spherical": True,
+        "key": "locatie",
+    }
+    if radius_km is not None:
+        geo_near["maxDistance"] = radius_km * 1000
+    pipeline = [{"$geoNear": geo_near}]
+    if nearest is not None:
+        pipeline.append({"$limit": nearest})
+    pipeline.append({"$project": {"_id": 0, "id": 1}})
+    return [city["id"] for city in db["Orase"].aggregate(pipeline)]
+
+def country_exists(id):
+    return metadata_cache.get(
+        ("country", id),
+        lambda: db["Tari"].find_one({"id": id}, {"_id": 1}) is not None,
+        collection_versions(["Tari"])[0]
+    )
 
-client = MongoClient(uri)
-db = client[database_name]
+def city_exists(id):
+    return metadata_cache.get(
+        ("city", id),
+        lambda: db["Orase"].find_one({"id": id}, {"_id": 1}) is not None,
+        collection_versions(["Orase"])[0]
+    )
 
-def get_next_sequence(name):
+def country_city_ids(id_tara):
+    return metadata_cache.get(
+        ("country_cities", id_tara),
+        lambda: tuple(city["id"] for city in db["Orase"].find({"id_tara": id_tara}, {"_id": 0, "id": 1})),
+        collection_versions(["Orase"])[0]
+    )
+
+versions = {}
+versions_lock = threading.Lock()
+
+def collection_versions(names):
+    now = time.monotonic()
+    with versions_lock:
+        stale = [name for name in names if name not in versions or versions[name][1] <= now]
+    if stale:
+        fetched = {name: 0 for name in stale}
+        for counter in db["versions"].find({"_id": {"$in": stale}}, {"version": 1}):
+            fetched[counter["_id"]] = counter.get("version", 0)
+        with versions_lock:
+            for name, version in fetched.items():
+                versions[name] = (version, now + version_cache_ttl)
+    with versions_lock:
+        return [versions[name][0] for name in names]
+
+def bump_version(*names):
+    for name in names:
+        db["versions"].update_one({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+    with versions_lock:
+        for name in names:
+            versions.pop(name, None)
+
+def compute_etag(collections, collection_versions, path, query_string, stream):
+    key = "|".join([
+        path,
+        query_string,
+        "ndjson" if stream else "json",
+        ",".join(f"{name}:{version}" for name, version in zip(collections, collection_versions)),
+    ])
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def cache_control_header(args, historical):
+    until_date = args.get("until")
+    if historical and until_date:
+        try:
+            if datetime.strptime(until_date, "%Y-%m-%d") < datetime.now():
+                return f"public, max-age={historical_max_age}"
+        except ValueError:
+            pass
+    return "no-cache"
+
+def conditional_get(*collections, historical=False):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET":
+                return view(*args, **kwargs)
+            try:
+                etag = compute_etag(
+                    collections, collection_versions(collections),
+                    request.path, request.query_string.decode(), wants_stream()
+                )
+            except Exception:
+                app.logger.exception("Versiunile colecțiilor nu au putut fi citite.")
+                return view(*args, **kwargs)
+
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = cache_control_header(request.args, historical)
+            response.vary.add("Accept")
+            return response
+        return wrapper
+    return decorator
+
+class WriteBehindBuffer:
+    def __init__(self, collection, max_size, batch_size, interval):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = queue.Queue(maxsize=max_size)
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, name="write-behind", daemon=True)
+            self.thread.start()
+        atexit.register(self.stop)
+
+    def put(self, document):
+        self.start()
+        try:
+            self.queue.put_nowait(document)
+        except queue.Full:
+            return False
+        return True
+
+    def run(self):
+        while True:
+            documents = []
+            deadline = time.monotonic() + self.interval
+            while len(documents) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    documents.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if documents:
+                self.flush(documents)
+            if self.stop_event.is_set() and self.queue.empty():
+                return
+
+    def insert(self, documents, retried):
+        try:
+            db[self.collection].insert_many(documents, ordered=False)
+            return documents
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            # on a retry, duplicates are the documents the interrupted attempt already wrote
+            failed = {error["index"] for error in errors if not (retried and error.get("code") == 11000)}
+            if failed:
+                app.logger.error("Write-behind: %d din %d documente nu au fost inserate în %s.", len(failed), len(documents), self.collection)
+            return [document for index, document in enumerate(documents) if index not in failed]
+
+    def flush(self, documents):
+        delay = write_behind_retry_backoff
+        for attempt in range(1, write_behind_max_attempts + 1):
+            try:
+                inserted = self.insert(documents, attempt > 1)
+                break
+            except Exception:
+                if attempt == write_behind_max_attempts:
+                    app.logger.exception(
+                        "Write-behind: %d documente pierdute în %s după %d încercări.", len(documents), self.collection, attempt
+                    )
+                    return
+                app.logger.warning("Write-behind: inserarea în %s a eșuat (încercarea %d), se reia.", self.collection, attempt)
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+        try:
+            rollup_insert(inserted)
+            bump_version(self.collection)
+        except Exception:
+            app.logger.exception("Write-behind: versiunea colecției %s nu a putut fi actualizată.", self.collection)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+temperature_buffer = WriteBehindBuffer("Temperaturi", write_behind_queue_size, write_behind_batch_size, write_behind_interval)
+
+def feed_event(change):
+    document = change["fullDocument"]
+    data = {"id": document["id"], "idOras": document["id_oras"], "valoare": document["valoare"], "timestamp": document["timestamp"]}
+    return {"id": change["_id"]["_data"], "event": None, "data": app.json.dumps(data)}
+
+def sse_message(event):
+    lines = []
+    if event["id"] is not None:
+        lines.append(f"id: {event['id']}")
+    if event["event"] is not None:
+        lines.append(f"event: {event['event']}")
+    lines.append(f"data: {event['data']}")
+    return "\n".join(lines) + "\n\n"
+
+class FeedSubscriber:
+    def __init__(self, city_id=None, country_id=None):
+        self.city_id = city_id
+        self.country_id = country_id
+        self.queue = queue.Queue(maxsize=feed_queue_size)
+        self.overflowed = False
+
+    def matches(self, id_oras):
+        if self.city_id is not None:
+            return id_oras == self.city_id
+        if self.country_id is not None:
+            return id_oras in country_city_ids(self.country_id)
+        return True
+
+    def deliver(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+class TemperatureFeed:
+    def __init__(self, collection):
+        self.collection = collection
+        self.subscribers = set()
+        self.resume_token = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, name="temperature-feed", daemon=True)
+            self.thread.start()
+        atexit.register(self.stop)
+
+    def subscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.add(subscriber)
+        self.start()
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, event, id_oras=None):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                if id_oras is None or subscriber.matches(id_oras):
+                    subscriber.deliver(event)
+            except Exception:
+                app.logger.exception("Fluxul de temperaturi: abonatul nu a putut fi notificat.")
+
+    def open_stream(self, resume_token, max_await_time_ms=1000):
+        return db[self.collection].watch(FEED_PIPELINE, resume_after=resume_token, max_await_time_ms=max_await_time_ms)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                with self.open_stream(self.resume_token) as stream:
+                    while not self.stop_event.is_set():
+                        change = stream.try_next()
+                        if change is None:
+                            continue
+                        self.resume_token = change["_id"]
+                        self.publish(feed_event(change), change["fullDocument"]["id_oras"])
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    app.logger.warning("Fluxul de temperaturi: poziția din oplog a fost pierdută; se reia de acum.")
+                    self.resume_token = None
+                    self.publish(FEED_RESET)
+                    continue
+                app.logger.exception("Fluxul de temperaturi s-a întrerupt; se reia.")
+                self.stop_event.wait(feed_retry_interval)
+            except Exception:
+                app.logger.exception("Fluxul de temperaturi s-a întrerupt; se reia.")
+                self.stop_event.wait(feed_retry_interval)
+
+    def catch_up(self, last_event_id, subscriber):
+        events = []
+        try:
+            with self.open_stream({"_data": last_event_id}, max_await_time_ms=100) as stream:
+                while len(events) < feed_catchup_max:
+                    change = stream.try_next()
+                    if change is None:
+                        return events
+                    if subscriber.matches(change["fullDocument"]["id_oras"]):
+                        events.append(feed_event(change))
+        except OperationFailure:
+            pass
+        return [FEED_RESET]
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+temperature_feed = TemperatureFeed("Temperaturi")
+
+request_state = threading.local()
+
+class MongoCommandListener(monitoring.CommandListener):
+    def __init__(self):
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name == "getMore":
+            collection = event.command.get("collection", "")
+        else:
+            collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ""
+        with self.lock:
+            self.pending[(event.connection_id, event.request_id)] = collection
+
+        commands = getattr(request_state, "commands", None)
+        if commands is not None and event.command_name in EXPLAINABLE_COMMANDS:
+            command = {
+                key: value for key, value in event.command.items()
+                if not key.startswith("$") and key not in EXPLAIN_EXCLUDED_FIELDS
+            }
+            commands.append((event.database_name, command))
+
+    def finish(self, event):
+        with self.lock:
+            return self.pending.pop((event.connection_id, event.request_id), "")
+
+    def succeeded(self, event):
+        collection = self.finish(event)
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name, "success").observe(event.duration_micros / 1e6)
+        cursor = event.reply.get("cursor")
+        if isinstance(cursor, dict):
+            documents = cursor.get("firstBatch", cursor.get("nextBatch", []))
+            MONGO_DOCUMENTS_RETURNED.labels(collection, event.command_name).inc(len(documents))
+
+    def failed(self, event):
+        collection = self.finish(event)
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name, "failure").observe(event.duration_micros / 1e6)
+
+command_listener = MongoCommandListener()
+
+def connect():
+    global client, db, transactions_available
+    client = MongoClient(
+        uri,
+        event_listeners=[command_listener],
+        maxPoolSize=max_pool_size,
+        minPoolSize=min_pool_size,
+        waitQueueTimeoutMS=wait_queue_timeout_ms,
+        serverSelectionTimeoutMS=server_selection_timeout_ms,
+    )
+    db = client[database_name]
+    transactions_available = None
+
+def create_app():
+    connect()
+    if id_allocator_mode == "time":
+        id_allocator.start()
+    cascade_sweeper.start()
+    return app
+
+def increment_counter(name, count):
     result = db["counters"].find_one_and_update(
         {"_id": name},
-        {"$inc": {"seq": 1}},
+        {"$inc": {"seq": count}},
         upsert=True,
         return_document=True
     )
     return result["seq"]
 
+class CounterIdAllocator:
+    def allocate(self, name, count):
+        last = increment_counter(name, count)
+        return list(range(last - count + 1, last + 1))
+
+class BlockIdAllocator:
+    def __init__(self, block_size):
+        self.block_size = block_size
+        self.blocks = {}
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+
+    def allocate(self, name, count):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.blocks = {}
+                self.pid = os.getpid()
+            block = self.blocks.get(name)
+            if block is None or block[1] - block[0] + 1 < count:
+                size = max(self.block_size, count)
+                last = increment_counter(name, size)
+                block = [last - size + 1, last]
+                self.blocks[name] = block
+            first = block[0]
+            block[0] += count
+        return list(range(first, first + count))
+
+class TimeIdAllocator:
+    EPOCH_MS = 1704067200000
+    WORKER_BITS = 10
+    SEQUENCE_BITS = 12
+
+    def __init__(self, lease_ttl):
+        self.lease_ttl = lease_ttl
+        self.worker_id = None
+        self.owner = None
+        self.valid_until = 0
+        self.pid = None
+        self.last_ms = -1
+        self.sequence = 0
+        self.lock = threading.Lock()
+
+    def claim(self):
+        workers = db["id_workers"]
+        now = datetime.now()
+        leased = {worker["_id"] for worker in workers.find({"expires": {"$gte": now}}, {"_id": 1})}
+        for slot in range(1 << self.WORKER_BITS):
+            if slot in leased:
+                continue
+            try:
+                workers.update_one(
+                    {"_id": slot, "expires": {"$lt": now}},
+                    {"$set": {"owner": self.owner, "expires": now + timedelta(seconds=self.lease_ttl)}},
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                continue
+            self.valid_until = time.monotonic() + self.lease_ttl / 2
+            return slot
+        raise RuntimeError("Nu există niciun worker id liber pentru ID_ALLOCATOR=time.")
+
+    def renew(self):
+        result = db["id_workers"].update_one(
+            {"_id": self.worker_id, "owner": self.owner},
+            {"$set": {"expires": datetime.now() + timedelta(seconds=self.lease_ttl)}}
+        )
+        if result.matched_count:
+            self.valid_until = time.monotonic() + self.lease_ttl / 2
+        else:
+            self.worker_id = None
+
+    def heartbeat(self, pid):
+        while os.getpid() == pid:
+            time.sleep(self.lease_ttl / 4)
+            with self.lock:
+                if self.worker_id is None or self.pid != pid:
+                    continue
+                try:
+                    self.renew()
+                except Exception:
+                    app.logger.exception("Lease-ul worker id %s nu a putut fi reînnoit.", self.worker_id)
+
+    def start(self):
+        with self.lock:
+            self.worker()
+
+    def release(self):
+        with self.lock:
+            if self.worker_id is not None and self.pid == os.getpid():
+                db["id_workers"].delete_one({"_id": self.worker_id, "owner": self.owner})
+                self.worker_id = None
+
+    def worker(self):
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.owner = f"{socket.gethostname()}:{self.pid}:{uuid.uuid4().hex}"
+            self.worker_id = None
+            threading.Thread(target=self.heartbeat, args=(self.pid,), name="id-worker-lease", daemon=True).start()
+            atexit.register(self.release)
+        if self.worker_id is not None and time.monotonic() >= self.valid_until:
+            self.renew()
+        if self.worker_id is None:
+            self.worker_id = self.claim()
+            self.last_ms = -1
+        return self.worker_id
+
+    def allocate(self, name, count):
+        ids = []
+        with self.lock:
+            worker = self.worker()
+            while len(ids) < count:
+                now = max(int(time.time() * 1000) - self.EPOCH_MS, self.last_ms)
+                if now != self.last_ms:
+                    self.last_ms = now
+                    self.sequence = 0
+                elif self.sequence >= 1 << self.SEQUENCE_BITS:
+                    time.sleep(0.0005)
+                    self.last_ms = max(self.last_ms, int(time.time() * 1000) - self.EPOCH_MS)
+                    if self.last_ms == now:
+                        continue
+                    self.sequence = 0
+                ids.append(
+                    (self.last_ms << (self.WORKER_BITS + self.SEQUENCE_BITS))
+                    | (worker << self.SEQUENCE_BITS)
+                    | self.sequence
+                )
+                self.sequence += 1
+        return ids
+
+def create_id_allocator(mode):
+    if mode == "block":
+        return BlockIdAllocator(id_block_size)
+    if mode == "time":
+        return TimeIdAllocator(id_worker_lease_ttl)
+    return CounterIdAllocator()
+
+id_allocator = create_id_allocator(id_allocator_mode)
+
+def allocate_ids(name, count):
+    return id_allocator.allocate(name, count)
+
+def get_next_sequence(name):
+    return allocate_ids(name, 1)[0]
+
+def create_temperatures_collection(timeseries):
+    if timeseries:
+        db.create_collection("Temperaturi", timeseries=TIMESERIES_OPTIONS)
+        db["Temperaturi"].create_index([("id_oras", ASCENDING), ("timestamp", ASCENDING)])
+    else:
+        temperaturi = db["Temperaturi"]
+        temperaturi.create_index([("id_oras", ASCENDING), ("timestamp", ASCENDING)], unique=True)
+
 def initialize_database():
     
     if "Tari" not in db.list_collection_names():
@@ -35,52 +758,561 @@ def initialize_database():
         orase.create_index([("id_tara", ASCENDING), ("nume_oras", ASCENDING)], unique=True)
 
     if "Temperaturi" not in db.list_collection_names():
-        temperaturi = db["Temperaturi"]
-        temperaturi.create_index([("id_oras", ASCENDING), ("timestamp", ASCENDING)], unique=True)
+        create_temperatures_collection(temperatures_storage == "timeseries")
     
+    db["Tari"].create_index("id", unique=True)
+    db["Orase"].create_index("id", unique=True)
+    db["Orase"].update_many(
+        {
+            "locatie": {"$exists": False},
+            "latitudine": {"$gte": -90, "$lte": 90},
+            "longitudine": {"$gte": -180, "$lte": 180},
+        },
+        [{"$set": {"locatie": {"type": "Point", "coordinates": ["$longitudine", "$latitudine"]}}}]
+    )
+    skipped = db["Orase"].count_documents({"locatie": {"$exists": False}})
+    if skipped:
+        app.logger.warning("%d orașe au coordonate în afara intervalului valid și nu apar în căutările geo.", skipped)
+    db["Orase"].create_index([("locatie", GEOSPHERE)])
+    db["Temperaturi"].create_index([("timestamp", ASCENDING), ("id", ASCENDING)])
+    db["TemperatureRollups"].create_index(
+        [("id_oras", ASCENDING), ("granularity", ASCENDING), ("bucket", ASCENDING)], unique=True
+    )
+
     db["counters"].update_one({"_id": "Tari"}, {"$setOnInsert": {"seq": 0}}, upsert=True)
     db["counters"].update_one({"_id": "Orase"}, {"$setOnInsert": {"seq": 0}}, upsert=True)
     db["counters"].update_one({"_id": "Temperaturi"}, {"$setOnInsert": {"seq": 0}}, upsert=True)
+    db["counters"].update_one({"_id": "cascade_jobs"}, {"$setOnInsert": {"seq": 0}}, upsert=True)
+    for counter in db["counters"].find({"version": {"$exists": True}}, {"version": 1}):
+        db["versions"].update_one({"_id": counter["_id"]}, {"$max": {"version": counter["version"]}}, upsert=True)
+
+class SlowRequestLogger:
+    def __init__(self, max_size):
+        self.queue = queue.Queue(maxsize=max_size)
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, name="slow-request-explain", daemon=True)
+            self.thread.start()
+
+    def put(self, method, path, elapsed, commands):
+        self.start()
+        try:
+            self.queue.put_nowait((method, path, elapsed, commands))
+        except queue.Full:
+            app.logger.warning(
+                "Cerere lentă %s %s: %.1f ms, %d comenzi MongoDB (coada de explain este plină).",
+                method, path, elapsed * 1000, len(commands)
+            )
+
+    def run(self):
+        while True:
+            self.log(*self.queue.get())
+
+    def log(self, method, path, elapsed, commands):
+        plans = []
+        for database_name, command in commands:
+            try:
+                explain = client[database_name].command({"explain": command, "verbosity": "queryPlanner"})
+                plans.append(explain.get("queryPlanner", {}).get("winningPlan", explain))
+            except Exception as e:
+                plans.append({"error": str(e)})
+        app.logger.warning(
+            "Cerere lentă %s %s: %.1f ms, %d comenzi MongoDB, planuri: %s",
+            method, path, elapsed * 1000, len(commands), json.dumps(plans, default=str)
+        )
+
+slow_request_logger = SlowRequestLogger(slow_request_queue_size)
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.route = request.url_rule.rule if request.url_rule else "unmatched"
+    REQUESTS_IN_FLIGHT.labels(g.route, request.method).inc()
+    request_state.commands = [] if slow_request_ms else None
+
+@app.after_request
+def record_request_metrics(response):
+    elapsed = time.perf_counter() - g.request_started
+    REQUEST_DURATION.labels(g.route, request.method, response.status_code).observe(elapsed)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exception):
+    if "route" in g:
+        REQUESTS_IN_FLIGHT.labels(g.route, request.method).dec()
+        commands = getattr(request_state, "commands", None)
+        elapsed = time.perf_counter() - g.request_started
+        if commands is not None and elapsed * 1000 >= slow_request_ms:
+            slow_request_logger.put(request.method, request.full_path, elapsed, commands)
+    request_state.commands = None
+
+def wants_stream():
+    if request.args.get("stream") == "1":
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"])
+    return best == "application/x-ndjson"
+
+class QueryError(Exception):
+    pass
+
+def parse_timestamp(value):
+    for date_format in ("%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            pass
+    raise QueryError("Cursorul 'after' nu este valid.")
+
+def parse_fields(mapping, args):
+    fields = args.get("fields")
+    if not fields:
+        return list(mapping)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in mapping]
+    if unknown:
+        raise QueryError(f"Câmpuri necunoscute: {', '.join(unknown)}.")
+    return names
+
+def parse_limit(args):
+    limit = args.get("limit")
+    if limit is None:
+        return None
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise QueryError("Parametrul 'limit' trebuie să fie un număr întreg pozitiv.")
+    if limit <= 0:
+        raise QueryError("Parametrul 'limit' trebuie să fie un număr întreg pozitiv.")
+    return min(limit, page_max_limit)
+
+def parse_after(sort_keys, args):
+    after = args.get("after")
+    if after is None:
+        return None
+    values = after.split(",")
+    if len(values) != len(sort_keys):
+        raise QueryError("Cursorul 'after' nu este valid.")
+    parsed = []
+    for key, value in zip(sort_keys, values):
+        if key == "timestamp":
+            parsed.append(parse_timestamp(value))
+            continue
+        try:
+            parsed.append(int(value))
+        except ValueError:
+            raise QueryError("Cursorul 'after' nu este valid.")
+    return parsed
+
+def encode_cursor(document, sort_keys):
+    values = []
+    for key in sort_keys:
+        value = document[key]
+        values.append(value.isoformat() if isinstance(value, datetime) else str(value))
+    return ",".join(values)
+
+def keyset_filter(sort_keys, values):
+    branches = []
+    for position, key in enumerate(sort_keys):
+        branch = {previous: values[index] for index, previous in enumerate(sort_keys[:position])}
+        branch[key] = {"$gt": values[position]}
+        branches.append(branch)
+    if len(branches) == 1:
+        return branches[0]
+    return {sort_keys[0]: {"$gte": values[0]}, "$or": branches}
+
+def strip_document(document, extra):
+    for key in extra:
+        document.pop(key, None)
+    return document
+
+def prepare_page(query, mapping, sort_keys, args):
+    names = parse_fields(mapping, args)
+    limit = parse_limit(args)
+    after = parse_after(sort_keys, args)
+    if after is not None:
+        query = {"$and": [query, keyset_filter(sort_keys, after)]}
+
+    projection = {"_id": 0}
+    for name in names:
+        projection[name] = "$" + mapping[name]
+    extra = []
+    if limit:
+        extra = [key for key in sort_keys if key not in projection]
+        for key in extra:
+            projection[key] = "$" + key
+    pipeline = [{"$match": query}]
+    if limit or after is not None:
+        pipeline.append({"$sort": {key: ASCENDING for key in sort_keys}})
+    if limit:
+        pipeline.append({"$limit": limit})
+    pipeline.append({"$project": projection})
+    return limit, pipeline, extra
+
+def temperature_sort_keys(query):
+    if isinstance(query.get("id_oras"), int) and temperatures_storage != "timeseries":
+        return ["timestamp"]
+    return ["timestamp", "id"]
+
+def page_response(collection, query, mapping, sort_keys):
+    limit, pipeline, extra = prepare_page(query, mapping, sort_keys, request.args)
+
+    if wants_stream():
+        def generate():
+            for document in db[collection].aggregate(pipeline, batchSize=stream_batch_size):
+                yield app.json.dumps_bytes(strip_document(document, extra)) + b"\n"
+        return Response(stream_with_context(generate()), status=200, mimetype="application/x-ndjson")
+
+    documents = list(db[collection].aggregate(pipeline))
+    next_cursor = None
+    if limit and len(documents) == limit:
+        next_cursor = encode_cursor(documents[-1], sort_keys)
+    if extra:
+        documents = [strip_document(document, extra) for document in documents]
+    response = jsonify(documents)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response, 200
+
+def temperatures_response(query):
+    return page_response("Temperaturi", query, TEMPERATURE_FIELDS, temperature_sort_keys(query))
+
+def transactions_supported():
+    global transactions_available
+    if transactions_available is None:
+        try:
+            hello = client.admin.command("hello")
+            transactions_available = "setName" in hello or hello.get("msg") == "isdbgrid"
+        except Exception:
+            transactions_available = False
+    return transactions_available
+
+def run_in_transaction(callback):
+    if not transactions_supported():
+        return callback(None)
+    with client.start_session() as session:
+        return session.with_transaction(callback)
+
+def create_cascade_job(job_id, type, target, city_ids, session):
+    now = datetime.now()
+    db["cascade_jobs"].insert_one({
+        "_id": job_id,
+        "type": type,
+        "target": target,
+        "remaining": city_ids,
+        "deleted": 0,
+        "status": "running",
+        "created": now,
+        "updated": now,
+    }, session=session)
+
+def reading_key(id_oras, timestamp):
+    return id_oras, timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000)
+
+def existing_readings(readings):
+    if temperatures_storage != "timeseries" or not readings:
+        return set()
+    by_city = {}
+    for id_oras, timestamp in readings:
+        by_city.setdefault(id_oras, []).append(timestamp)
+    query = {"$or": [{"id_oras": id_oras, "timestamp": {"$in": timestamps}} for id_oras, timestamps in by_city.items()]}
+    return {
+        reading_key(temperature["id_oras"], temperature["timestamp"])
+        for temperature in db["Temperaturi"].find(query, {"_id": 0, "id_oras": 1, "timestamp": 1})
+    }
+
+def rollup_bucket(timestamp, granularity):
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def rollup_insert(temperatures):
+    buckets = {}
+    for temperature in temperatures:
+        for granularity in ROLLUP_GRANULARITIES:
+            key = (temperature["id_oras"], granularity, rollup_bucket(temperature["timestamp"], granularity))
+            valoare = temperature["valoare"]
+            if key not in buckets:
+                buckets[key] = {"count": 0, "sum": 0.0, "min": valoare, "max": valoare}
+            bucket = buckets[key]
+            bucket["count"] += 1
+            bucket["sum"] += valoare
+            bucket["min"] = min(bucket["min"], valoare)
+            bucket["max"] = max(bucket["max"], valoare)
+
+    operations = [
+        UpdateOne(
+            {"id_oras": id_oras, "granularity": granularity, "bucket": bucket_start},
+            {
+                "$inc": {"count": bucket["count"], "sum": bucket["sum"]},
+                "$min": {"min": bucket["min"]},
+                "$max": {"max": bucket["max"]},
+            },
+            upsert=True
+        )
+        for (id_oras, granularity, bucket_start), bucket in buckets.items()
+    ]
+    if not operations:
+        return
+    try:
+        db["TemperatureRollups"].bulk_write(operations, ordered=False)
+    except Exception:
+        app.logger.exception("TemperatureRollups nu a putut fi actualizată; rulați rebuild-rollups.")
 
-def delete_country(id):
-    countries_collection = db["Tari"]
-    cities_collection = db["Orase"]
+def rollup_adjust(removed, added):
+    try:
+        adjust_buckets(removed, added)
+    except Exception:
+        app.logger.exception("TemperatureRollups nu a putut fi actualizată; rulați rebuild-rollups.")
+
+def adjust_buckets(removed, added):
+    deltas = {}
+    for sign, temperatures in ((-1, removed), (1, added)):
+        for temperature in temperatures:
+            for granularity in ROLLUP_GRANULARITIES:
+                key = (temperature["id_oras"], granularity, rollup_bucket(temperature["timestamp"], granularity))
+                delta = deltas.setdefault(key, {"count": 0, "sum": 0.0, "removed": [], "added": []})
+                delta["count"] += sign
+                delta["sum"] += sign * temperature["valoare"]
+                delta["removed" if sign < 0 else "added"].append(temperature["valoare"])
+
+    rollups = db["TemperatureRollups"]
+    for (id_oras, granularity, bucket_start), delta in deltas.items():
+        key = {"id_oras": id_oras, "granularity": granularity, "bucket": bucket_start}
+        update = {"$inc": {"count": delta["count"], "sum": delta["sum"]}}
+        if delta["added"]:
+            update["$min"] = {"min": min(delta["added"])}
+            update["$max"] = {"max": max(delta["added"])}
+        rollup = rollups.find_one_and_update(
+            key, update, upsert=bool(delta["added"]), return_document=ReturnDocument.AFTER
+        )
+        if rollup is None:
+            continue
+        if rollup["count"] <= 0:
+            rollups.delete_one({**key, "count": {"$lte": 0}})
+            continue
+        if any(value <= rollup["min"] or value >= rollup["max"] for value in delta["removed"]):
+            refresh_extremes(key, ROLLUP_GRANULARITIES[granularity])
+
+def refresh_extremes(key, length):
+    rollups = db["TemperatureRollups"]
+    pipeline = [
+        {"$match": {"id_oras": key["id_oras"], "timestamp": {"$gte": key["bucket"], "$lt": key["bucket"] + length}}},
+        {"$group": {"_id": None, "min": {"$min": "$valoare"}, "max": {"$max": "$valoare"}}},
+    ]
+    for _ in range(5):
+        rollup = rollups.find_one(key, {"count": 1, "sum": 1})
+        if rollup is None:
+            return
+        totals = list(db["Temperaturi"].aggregate(pipeline))
+        if not totals:
+            return
+        # only applies if no other write touched the bucket since it was read
+        result = rollups.update_one(
+            {**key, "count": rollup["count"], "sum": rollup["sum"]},
+            {"$set": {"min": totals[0]["min"], "max": totals[0]["max"]}}
+        )
+        if result.matched_count:
+            return
+    app.logger.warning("TemperatureRollups %s: min/max nu au putut fi recalculate; rulați rebuild-rollups.", key)
+
+def rebuild_rollups(id_oras=None):
+    match = {} if id_oras is None else {"id_oras": id_oras}
+    db["TemperatureRollups"].delete_many(match)
+    for granularity in ROLLUP_GRANULARITIES:
+        db["Temperaturi"].aggregate([
+            {"$match": match},
+            {"$group": {
+                "_id": {"id_oras": "$id_oras", "bucket": {"$dateTrunc": {"date": "$timestamp", "unit": granularity}}},
+                "count": {"$sum": 1},
+                "sum": {"$sum": "$valoare"},
+                "min": {"$min": "$valoare"},
+                "max": {"$max": "$valoare"},
+            }},
+            {"$project": {
+                "_id": 0,
+                "id_oras": "$_id.id_oras",
+                "granularity": {"$literal": granularity},
+                "bucket": "$_id.bucket",
+                "count": 1,
+                "sum": 1,
+                "min": 1,
+                "max": 1,
+            }},
+            {"$merge": {
+                "into": "TemperatureRollups",
+                "on": ["id_oras", "granularity", "bucket"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            }},
+        ])
+
+def delete_temperatures_in_batches(id_oras, job_id):
     temperatures_collection = db["Temperaturi"]
+    jobs_collection = db["cascade_jobs"]
+    while True:
+        boundary = list(
+            temperatures_collection.find({"id_oras": id_oras}, {"_id": 0, "timestamp": 1})
+            .sort("timestamp", ASCENDING)
+            .skip(cascade_batch_size - 1)
+            .limit(1)
+        )
+        query = {"id_oras": id_oras}
+        if boundary:
+            query["timestamp"] = {"$lte": boundary[0]["timestamp"]}
+        result = temperatures_collection.delete_many(query)
+        bump_version("Temperaturi")
+        jobs_collection.update_one(
+            {"_id": job_id},
+            {"$inc": {"deleted": result.deleted_count}, "$set": {"updated": datetime.now()}}
+        )
+        if not boundary:
+            return
+
+def heartbeat_cascade_job(job_id, finished):
+    while not finished.wait(cascade_heartbeat_interval):
+        try:
+            db["cascade_jobs"].update_one({"_id": job_id, "status": "running"}, {"$set": {"updated": datetime.now()}})
+        except Exception:
+            app.logger.exception("Ștergerea în cascadă %s: heartbeat eșuat.", job_id)
+
+def run_cascade_job(job_id):
+    jobs_collection = db["cascade_jobs"]
+    finished = threading.Event()
+    threading.Thread(
+        target=heartbeat_cascade_job, args=(job_id, finished), name=f"cascade-heartbeat-{job_id}", daemon=True
+    ).start()
+    try:
+        while True:
+            job = jobs_collection.find_one({"_id": job_id}, {"remaining": 1})
+            if not job["remaining"]:
+                break
+            city_id = job["remaining"][0]
+            delete_temperatures_in_batches(city_id, job_id)
+            db["TemperatureRollups"].delete_many({"id_oras": city_id})
+            bump_version("Temperaturi")
+            jobs_collection.update_one(
+                {"_id": job_id},
+                {"$pull": {"remaining": city_id}, "$set": {"updated": datetime.now()}}
+            )
+        jobs_collection.update_one({"_id": job_id}, {"$set": {"status": "done", "updated": datetime.now()}})
+    except Exception as e:
+        app.logger.exception("Ștergerea în cascadă %s a eșuat.", job_id)
+        jobs_collection.update_one({"_id": job_id}, {"$set": {"status": "failed", "error": str(e), "updated": datetime.now()}})
+    finally:
+        finished.set()
+
+def start_cascade_job(job_id):
+    threading.Thread(target=run_cascade_job, args=(job_id,), name=f"cascade-{job_id}", daemon=True).start()
+
+def resume_cascade_jobs():
+    jobs_collection = db["cascade_jobs"]
+    while True:
+        now = datetime.now()
+        job = jobs_collection.find_one_and_update(
+            {"$or": [
+                {"status": "running", "updated": {"$lt": now - timedelta(seconds=cascade_stale_after)}},
+                {"status": "failed", "updated": {"$lt": now - timedelta(seconds=cascade_retry_after)}},
+            ]},
+            {"$set": {"status": "running", "updated": now}, "$unset": {"error": ""}}
+        )
+        if job is None:
+            return
+        start_cascade_job(job["_id"])
+
+class CascadeSweeper:
+    def __init__(self, interval):
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, name="cascade-sweeper", daemon=True)
+            self.thread.start()
+        atexit.register(self.stop)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                resume_cascade_jobs()
+            except Exception:
+                app.logger.exception("Ștergerile în cascadă neterminate nu au putut fi reluate.")
+            self.stop_event.wait(self.interval)
 
-    result = countries_collection.delete_one({"id": id})
-    if result.deleted_count == 0:
-        return
-
-    city_ids = [city["id"] for city in cities_collection.find({"id_tara": id})]
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
 
-    cities_collection.delete_many({"id_tara": id})
+cascade_sweeper = CascadeSweeper(cascade_sweep_interval)
 
-    if city_ids:
-        temperatures_collection.delete_many({"id_oras": {"$in": city_ids}})
+def delete_country(id):
+    countries_collection = db["Tari"]
+    cities_collection = db["Orase"]
+    job_id = get_next_sequence("cascade_jobs")
+
+    def remove(session):
+        result = countries_collection.delete_one({"id": id}, session=session)
+        if result.deleted_count == 0:
+            return None
+        city_ids = [city["id"] for city in cities_collection.find({"id_tara": id}, {"_id": 0, "id": 1}, session=session)]
+        cities_collection.delete_many({"id_tara": id}, session=session)
+        create_cascade_job(job_id, "country", id, city_ids, session)
+        return city_ids
+
+    city_ids = run_in_transaction(remove)
+    if city_ids is None:
+        return None
+    metadata_cache.invalidate(("country", id), ("country_cities", id), *[("city", city_id) for city_id in city_ids])
+    bump_version("Tari", "Orase")
+
+    start_cascade_job(job_id)
+    return job_id
 
 def delete_city(id):
     cities_collection = db["Orase"]
-    temperatures_collection = db["Temperaturi"]
+    job_id = get_next_sequence("cascade_jobs")
 
-    result = cities_collection.delete_one({"id": id})
-    if result.deleted_count == 0:
-        return
-    temperatures_collection.delete_many({"id_oras": id})
+    def remove(session):
+        city = cities_collection.find_one_and_delete({"id": id}, session=session)
+        if city is None:
+            return None
+        create_cascade_job(job_id, "city", id, [id], session)
+        return city
+
+    city = run_in_transaction(remove)
+    if city is None:
+        return None
+    metadata_cache.invalidate(("city", id), ("country_cities", city["id_tara"]))
+    bump_version("Orase")
+
+    start_cascade_job(job_id)
+    return job_id
 
 def delete_temperature(id):
     temperatures_collection = db["Temperaturi"]
-    temperatures_collection.delete_one({"id": id})
-    
+    temperature = temperatures_collection.find_one_and_delete({"id": id})
+    if temperature is not None:
+        rollup_adjust([temperature], [])
+        bump_version("Temperaturi")
+    return temperature
+
 @app.route('/api/countries', methods = ["GET", "POST"])
+@conditional_get("Tari")
 def get_country():
     if request.method == "GET":
         try:
-            countries = list(db["Tari"].find({}, {"_id": 0}))
-            for country in countries:
-                country["nume"] = country.pop("nume_tara")
-                country["lat"] = country.pop("latitudine")
-                country["lon"] = country.pop("longitudine")
-            return jsonify(countries), 200
+            return page_response("Tari", {}, COUNTRY_FIELDS, ["id"])
+        except QueryError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
                 
@@ -100,10 +1332,6 @@ def get_country():
                 return jsonify({"error": "Câmpurile 'lat' și 'lon' trebuie să fie numere de tip float."}), 400
 
             countries_collection = db["Tari"]
-            existing_country = countries_collection.find_one({"nume_tara": data["nume"]})
-            if existing_country:
-                return jsonify({"error": "Țara există deja."}), 409
-
             id = get_next_sequence("Tari")
             country = {
                 "id": id,
@@ -112,7 +1340,12 @@ def get_country():
                 "longitudine": lon,
             }
             
-            countries_collection.insert_one(country)
+            try:
+                countries_collection.insert_one(country)
+            except DuplicateKeyError:
+                return jsonify({"error": "Țara există deja."}), 409
+            metadata_cache.invalidate(("country", id))
+            bump_version("Tari")
 
             return jsonify({"id": country["id"]}), 201
 
@@ -143,19 +1376,20 @@ def update_country(id):
                 return jsonify({"error": "Câmpurile 'lat' și 'lon' trebuie să fie numere de tip float."}), 400
 
             countries_collection = db["Tari"]
-            country = countries_collection.find_one({"id": id})
-            if not country:
-                return jsonify({"error": "Țara nu există."}), 404
-            
-            existing_country = countries_collection.find_one({"nume_tara": data["nume"]})
-            if existing_country:
-                return jsonify({"error": "Țara există deja."}), 409
-
-            country["nume_tara"] = data["nume"]
-            country["latitudine"] = lat
-            country["longitudine"] = lon
+            country = {
+                "nume_tara": data["nume"],
+                "latitudine": lat,
+                "longitudine": lon,
+            }
 
-            countries_collection.update_one({"id": id}, {"$set": country})
+            try:
+                result = countries_collection.update_one({"id": id}, {"$set": country})
+            except DuplicateKeyError:
+                return jsonify({"error": "Țara există deja."}), 409
+            if result.matched_count == 0:
+                return jsonify({"error": "Țara nu există."}), 404
+            metadata_cache.invalidate(("country", id))
+            bump_version("Tari")
 
             return Response(status=200)
 
@@ -164,29 +1398,24 @@ def update_country(id):
 
     if request.method == "DELETE":
         try:
-            countries_collection = db["Tari"]
-            country = countries_collection.find_one({"id": id})   
-            if not country:
+            job_id = delete_country(id)
+            if job_id is None:
                 return jsonify({"error": "Țara nu a fost găsită."}), 404
-            delete_country(id)
-            return Response(status=200)
+            response = Response(status=200)
+            response.headers["X-Cascade-Job"] = str(job_id)
+            return response
 
         except Exception as e:
             return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
 
 @app.route('/api/cities', methods = ["GET", "POST"])
+@conditional_get("Orase")
 def get_city():
     if request.method == "GET":
         try:
-            cities = list(db["Orase"].find({}, {"_id": 0}))
-
-            for city in cities:
-                city["idTara"] = city.pop("id_tara")
-                city["nume"] = city.pop("nume_oras")
-                city["lat"] = city.pop("latitudine")
-                city["lon"] = city.pop("longitudine")
-            
-            return jsonify(cities), 200
+            return page_response("Orase", {}, CITY_FIELDS, ["id"])
+        except QueryError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
@@ -206,17 +1435,13 @@ def get_city():
                 lon = float(data["lon"])
             except ValueError:
                 return jsonify({"error": "Câmpurile 'lat' și 'lon' trebuie să fie numere de tip float."}), 400
+            if not valid_coordinates(lat, lon):
+                return jsonify({"error": "Coordonatele sunt în afara intervalului valid."}), 400
 
-            countries_collection = db["Tari"]
-            country = countries_collection.find_one({"id": data["idTara"]})
-            if not country:
+            if not country_exists(data["idTara"]):
                 return jsonify({"error": "Țara nu există."}), 404
         
             cities_collection = db["Orase"]
-            existing_city = cities_collection.find_one({"id_tara": data["idTara"], "nume_oras": data["nume"]})
-            if existing_city:
-                return jsonify({"error": "Orașul există deja."}), 409
-
             id = get_next_sequence("Orase")
             city = {
                 "id": id,
@@ -224,8 +1449,14 @@ def get_city():
                 "nume_oras": data["nume"],
                 "latitudine": lat,
                 "longitudine": lon,
+                "locatie": geo_point(lat, lon),
             }
-            cities_collection.insert_one(city)
+            try:
+                cities_collection.insert_one(city)
+            except DuplicateKeyError:
+                return jsonify({"error": "Orașul există deja."}), 409
+            metadata_cache.invalidate(("city", id), ("country_cities", data["idTara"]))
+            bump_version("Orase")
 
             return jsonify({"id": city["id"]}), 201
 
@@ -254,27 +1485,35 @@ def update_city(id):
                 lon = float(data["lon"])
             except ValueError:
                 return jsonify({"error": "Câmpurile 'lat' și 'lon' trebuie să fie numere de tip float."}), 400
+            if not valid_coordinates(lat, lon):
+                return jsonify({"error": "Coordonatele sunt în afara intervalului valid."}), 400
 
-            countries_collection = db["Tari"]
-            country = countries_collection.find_one({"id": data["idTara"]})
-            if not country:
+            if not country_exists(data["idTara"]):
                 return jsonify({"error": "Țara nu există."}), 404
 
             cities_collection = db["Orase"]
-            city = cities_collection.find_one({"id": id})
-            if not city:
-                return jsonify({"error": "Orașul nu există."}), 404
-            
-            existing_city = cities_collection.find_one({"id_tara": data["idTara"], "nume_oras": data["nume"]})
-            if existing_city:
-                return jsonify({"error": "Orașul există deja."}), 409
+            city = {
+                "id_tara": data["idTara"],
+                "nume_oras": data["nume"],
+                "latitudine": lat,
+                "longitudine": lon,
+                "locatie": geo_point(lat, lon),
+            }
 
-            city["id_tara"] = data["idTara"]
-            city["nume_oras"] = data["nume"]
-            city["latitudine"] = lat
-            city["longitudine"] = lon
+            try:
+                previous = cities_collection.find_one_and_update(
+                    {"id": id},
+                    {"$set": city},
+                    projection={"_id": 0, "id_tara": 1},
+                    return_document=ReturnDocument.BEFORE
+                )
+            except DuplicateKeyError:
+                return jsonify({"error": "Orașul există deja."}), 409
+            if previous is None:
+                return jsonify({"error": "Orașul nu există."}), 404
 
-            cities_collection.update_one({"id": id}, {"$set": city})
+            metadata_cache.invalidate(("city", id), ("country_cities", previous["id_tara"]), ("country_cities", data["idTara"]))
+            bump_version("Orase")
 
             return Response(status=200)
 
@@ -283,48 +1522,60 @@ def update_city(id):
 
     if request.method == "DELETE":
         try:
-            cities_collection = db["Orase"]
-            city = cities_collection.find_one({"id": id})
-            if not city:
+            job_id = delete_city(id)
+            if job_id is None:
                 return jsonify({"error": "Orașul nu a fost găsit."}), 404
-            delete_city(id)
-            return Response(status=200)
+            response = Response(status=200)
+            response.headers["X-Cascade-Job"] = str(job_id)
+            return response
 
         except Exception as e:
             return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
 
 @app.route('/api/cities/country/<int:idTara>', methods = ["GET"])
+@conditional_get("Tari", "Orase")
 def get_cities_by_country(idTara):
     try:
-        countries_collection = db["Tari"]
-        country = countries_collection.find_one({"id": idTara})
-        if not country:
+        if not country_exists(idTara):
             return jsonify({"error": "Țara nu există."}), 404
 
-        cities_collection = db["Orase"]
-        cities = list(cities_collection.find({"id_tara": idTara}, {"_id": 0}))
-        for city in cities:
-            city["idTara"] = city.pop("id_tara")
-            city["nume"] = city.pop("nume_oras")
-            city["lat"] = city.pop("latitudine")
-            city["lon"] = city.pop("longitudine")
-        return jsonify(cities), 200
+        return page_response("Orase", {"id_tara": idTara}, CITY_FIELDS, ["id"])
 
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
 
 @app.route('/api/temperatures', methods = ["GET", "POST"])
+@conditional_get("Temperaturi", "Orase", historical=True)
 def get_temperature():
     if request.method == "GET":
         try:
             lat = request.args.get('lat', type=float)
             lon = request.args.get('lon', type=float)
+            near = request.args.get('near')
+            radius_km = request.args.get('radiusKm', type=float)
+            nearest = request.args.get('nearest', type=int)
             from_date = request.args.get('from')
             until_date = request.args.get('until')
 
             query = {}
 
-            if lat is not None or lon is not None:
+            if near is not None:
+                near_lat, near_lon = parse_near(near)
+                if radius_km is not None and radius_km <= 0:
+                    return jsonify({"error": "Parametrul 'radiusKm' trebuie să fie pozitiv."}), 400
+                if nearest is not None and nearest <= 0:
+                    return jsonify({"error": "Parametrul 'nearest' trebuie să fie un număr întreg pozitiv."}), 400
+                if radius_km is None and nearest is None:
+                    nearest = 1
+
+                city_ids = find_nearby_city_ids(near_lat, near_lon, radius_km, nearest)
+                if not city_ids:
+                    return jsonify({"error": "Nu există orașe pentru coordonatele specificate."}), 404
+                query["id_oras"] = {"$in": city_ids}
+
+            elif lat is not None or lon is not None:
                 city_query = {}
                 if lat is not None:
                     city_query["latitudine"] = lat
@@ -352,10 +1603,10 @@ def get_temperature():
                 except ValueError:
                     return jsonify({"error": "Formatul datei nu este AAAA-LL-ZZ"}), 400
 
-            temperatures = list(db["Temperaturi"].find(query, {"_id": 0, "id_oras": 0}))
-
-            return jsonify(temperatures), 200
+            return temperatures_response(query)
 
+        except QueryError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
 
@@ -372,14 +1623,26 @@ def get_temperature():
             except ValueError:
                 return jsonify({"error": "Valoarea temperaturii nu este un numar."}), 400    
 
-            cities_collection = db["Orase"]
-            city = cities_collection.find_one({"id": data["idOras"]})
-            if not city:
+            if not city_exists(data["idOras"]):
                 return jsonify({"error": "Orașul nu există."}), 404
             date_time = datetime.now()
+
+            if write_behind_enabled:
+                id = get_next_sequence("Temperaturi")
+                temperature = {
+                    "id": id,
+                    "valoare": float(data["valoare"]),
+                    "timestamp": date_time,
+                    "id_oras": data["idOras"],
+                }
+                if not temperature_buffer.put(temperature):
+                    response = jsonify({"error": "Prea multe cereri, încercați mai târziu."})
+                    response.headers["Retry-After"] = str(int(write_behind_interval) or 1)
+                    return response, 429
+                return jsonify({"id": id}), 202
+
             temperatures_collection = db["Temperaturi"]
-            existing_temperature = temperatures_collection.find_one({"id_oras": data["idOras"], "timestamp": date_time})
-            if existing_temperature:
+            if existing_readings([(data["idOras"], date_time)]):
                 return jsonify({"error": "Temperatura există deja."}), 409
             id = get_next_sequence("Temperaturi")
             temperature = {
@@ -389,13 +1652,133 @@ def get_temperature():
                 "id_oras": data["idOras"],
             }
             
-            temperatures_collection.insert_one(temperature)
+            try:
+                temperatures_collection.insert_one(temperature)
+            except DuplicateKeyError:
+                return jsonify({"error": "Temperatura există deja."}), 409
+            rollup_insert([temperature])
+            bump_version("Temperaturi")
 
             return jsonify({"id": temperature["id"]}), 201
 
         except Exception as e:
             return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
 
+def parse_batch_body():
+    if request.mimetype == "application/x-ndjson":
+        lines = request.get_data(as_text=True).splitlines()
+        return [json.loads(line) for line in lines if line.strip()]
+    rows = request.get_json(silent=True)
+    if rows is None:
+        raise ValueError("Corpul cererii nu este JSON valid.")
+    return rows
+
+@app.route('/api/temperatures/batch', methods = ["POST"])
+def post_temperatures_batch():
+    try:
+        try:
+            rows = parse_batch_body()
+        except ValueError:
+            return jsonify({"error": "Corpul cererii nu este JSON valid."}), 400
+
+        if not isinstance(rows, list):
+            return jsonify({"error": "Corpul cererii trebuie să fie o listă."}), 400
+        if len(rows) > batch_max_size:
+            return jsonify({"error": f"Maxim {batch_max_size} temperaturi per cerere."}), 413
+
+        results = [None] * len(rows)
+        valid = []
+        for index, data in enumerate(rows):
+            if not isinstance(data, dict) or not all(key in data for key in ("idOras", "valoare")):
+                results[index] = {"error": "Câmpuri lipsă.", "status": 400}
+                continue
+            if not isinstance(data["idOras"], int):
+                results[index] = {"error": "Câmpul 'idOras' trebuie să fie un număr întreg.", "status": 400}
+                continue
+            try:
+                valoare = float(data["valoare"])
+            except (TypeError, ValueError):
+                results[index] = {"error": "Valoarea temperaturii nu este un numar.", "status": 400}
+                continue
+            date_time = None
+            if "timestamp" in data:
+                try:
+                    date_time = datetime.fromisoformat(data["timestamp"])
+                except (TypeError, ValueError):
+                    results[index] = {"error": "Formatul datei nu este ISO-8601 (AAAA-LL-ZZTHH:MM:SS[.ffffff])", "status": 400}
+                    continue
+                if date_time.tzinfo is not None:
+                    date_time = date_time.astimezone().replace(tzinfo=None)
+            valid.append((index, data["idOras"], valoare, date_time))
+
+        occurrences = {}
+        for row in valid:
+            occurrences[row[1]] = occurrences.get(row[1], 0) + 1
+        timed = []
+        for row in valid:
+            if row[3] is None and occurrences[row[1]] > 1:
+                results[row[0]] = {"error": "Câmpul 'timestamp' este obligatoriu când orașul apare de mai multe ori în lot.", "status": 400}
+                continue
+            timed.append(row)
+        valid = timed
+
+        city_ids = {row[1] for row in valid}
+        existing_ids = set()
+        if city_ids:
+            cities = db["Orase"].find({"id": {"$in": list(city_ids)}}, {"_id": 0, "id": 1})
+            existing_ids = {city["id"] for city in cities}
+
+        pending = []
+        for row in valid:
+            if row[1] not in existing_ids:
+                results[row[0]] = {"error": "Orașul nu există.", "status": 404}
+                continue
+            pending.append(row)
+
+        if pending and temperatures_storage == "timeseries":
+            pending = [(index, id_oras, valoare, date_time or datetime.now()) for index, id_oras, valoare, date_time in pending]
+            taken = existing_readings([(row[1], row[3]) for row in pending])
+            unique = []
+            for row in pending:
+                key = reading_key(row[1], row[3])
+                if key in taken:
+                    results[row[0]] = {"error": "Temperatura există deja.", "status": 409}
+                    continue
+                taken.add(key)
+                unique.append(row)
+            pending = unique
+
+        if pending:
+            ids = allocate_ids("Temperaturi", len(pending))
+            temperatures = []
+            for offset, (index, id_oras, valoare, date_time) in enumerate(pending):
+                temperatures.append({
+                    "id": ids[offset],
+                    "valoare": valoare,
+                    "timestamp": date_time or datetime.now(),
+                    "id_oras": id_oras,
+                })
+                results[index] = {"id": ids[offset]}
+
+            failed = set()
+            try:
+                db["Temperaturi"].insert_many(temperatures, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    failed.add(error["index"])
+                    index = pending[error["index"]][0]
+                    if error.get("code") == 11000:
+                        results[index] = {"error": "Temperatura există deja.", "status": 409}
+                    else:
+                        results[index] = {"error": error.get("errmsg", "Eroare la inserare."), "status": 500}
+            rollup_insert([temperature for index, temperature in enumerate(temperatures) if index not in failed])
+            bump_version("Temperaturi")
+
+        return jsonify(results), 200
+
+    except Exception as e:
+        return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
+
 @app.route('/api/temperatures/<int:id>', methods = ["PUT", "DELETE"])
 def update_temperature(id):
     if request.method == "PUT":
@@ -414,24 +1797,31 @@ def update_temperature(id):
             except ValueError:
                 return jsonify({"error": "Valoarea temperaturii nu este un numar."}), 400
 
-            cities_collection = db["Orase"]
-            city = cities_collection.find_one({"id": data["idOras"]})
-            if not city:
+            if not city_exists(data["idOras"]):
                 return jsonify({"error": "Orașul nu există."}), 404
 
             temperatures_collection = db["Temperaturi"]
-            temperature = temperatures_collection.find_one({"id": id})
-            if not temperature:
-                return jsonify({"error": "Temperatura nu există."}), 404
-
-            existing_temperature = temperatures_collection.find_one({"id_oras": data["idOras"], "timestamp": temperature["timestamp"]})
-            if existing_temperature:
+            if temperatures_storage == "timeseries":
+                current = temperatures_collection.find_one({"id": id}, {"_id": 0, "id_oras": 1, "timestamp": 1})
+                if current is None:
+                    return jsonify({"error": "Temperatura nu există."}), 404
+                if current["id_oras"] != data["idOras"] and existing_readings([(data["idOras"], current["timestamp"])]):
+                    return jsonify({"error": "Temperatura există deja."}), 409
+            try:
+                temperature = temperatures_collection.find_one_and_update(
+                    {"id": id},
+                    {"$set": {"id_oras": data["idOras"], "valoare": float(data["valoare"])}},
+                    projection={"_id": 0, "id_oras": 1, "timestamp": 1, "valoare": 1},
+                    return_document=ReturnDocument.BEFORE
+                )
+            except DuplicateKeyError:
                 return jsonify({"error": "Temperatura există deja."}), 409
+            if temperature is None:
+                return jsonify({"error": "Temperatura nu există."}), 404
 
-            temperature["id_oras"] = data["idOras"]
-            temperature["valoare"] = float(data["valoare"])
-
-            temperatures_collection.update_one({"id": id}, {"$set": temperature})
+            updated = {"id_oras": data["idOras"], "timestamp": temperature["timestamp"], "valoare": float(data["valoare"])}
+            rollup_adjust([temperature], [updated])
+            bump_version("Temperaturi")
 
             return Response(status=200)
 
@@ -440,17 +1830,15 @@ def update_temperature(id):
 
     if request.method == "DELETE":
         try:
-            temperatures_collection = db["Temperaturi"]
-            temperature = temperatures_collection.find_one({"id": id})
-            if not temperature:
+            if delete_temperature(id) is None:
                 return jsonify({"error": "Temperatura nu a fost găsită."}), 404
-            delete_temperature(id)
             return Response(status=200)
 
         except Exception as e:
             return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
 
 @app.route('/api/temperatures/cities/<int:id_oras>', methods = ["GET"])
+@conditional_get("Temperaturi", historical=True)
 def get_temperatures_by_city(id_oras):
     try:
         from_date = request.args.get('from')
@@ -472,24 +1860,22 @@ def get_temperatures_by_city(id_oras):
             except ValueError:
                 return jsonify({"error": "Formatul datei nu este AAAA-LL-ZZ"}), 400
 
-        temperatures = list(db["Temperaturi"].find(query, {"_id": 0, "id_oras": 0}))
-
-        return jsonify(temperatures), 200
+        return temperatures_response(query)
 
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
 
 @app.route('/api/temperatures/countries/<int:id_tara>', methods=["GET"])
+@conditional_get("Temperaturi", "Orase", historical=True)
 def get_temperatures_by_country(id_tara):
     try:
 
-        cities_collection = db["Orase"]
-        cities = list(cities_collection.find({"id_tara": id_tara}, {"_id": 0}))
-        if not cities:
+        city_ids = list(country_city_ids(id_tara))
+        if not city_ids:
             return jsonify({"error": "Țara nu există sau nu are orașe asociate."}), 404
 
-        city_ids = [city["id"] for city in cities]
-
         from_date = request.args.get('from')
         until_date = request.args.get('until')
         query = {"id_oras": {"$in": city_ids}}
@@ -508,13 +1894,398 @@ def get_temperatures_by_country(id_tara):
             except ValueError:
                 return jsonify({"error": "Formatul datei nu este AAAA-LL-ZZ"}), 400
 
-        temperatures_collection = db["Temperaturi"]
-        temperatures = list(temperatures_collection.find(query, {"_id": 0, "id_oras": 0}))
+        return temperatures_response(query)
+
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
+
+@app.route('/api/jobs/<int:id>', methods=["GET"])
+def get_cascade_job(id):
+    try:
+        job = db["cascade_jobs"].find_one({"_id": id})
+        if not job:
+            return jsonify({"error": "Ștergerea nu există."}), 404
+        return jsonify({
+            "id": job["_id"],
+            "type": job["type"],
+            "target": job["target"],
+            "status": job["status"],
+            "remaining": len(job["remaining"]),
+            "deleted": job["deleted"],
+            "created": job["created"],
+            "updated": job["updated"],
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
+
+@app.route('/metrics', methods=["GET"])
+def get_metrics():
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), status=200, content_type=CONTENT_TYPE_LATEST)
+
+@app.route('/api/cache/stats', methods=["GET"])
+def get_cache_stats():
+    return jsonify(metadata_cache.stats()), 200
+
+@app.route('/api/temperatures/stats', methods=["GET"])
+@conditional_get("Temperaturi", "Orase", historical=True)
+def get_temperature_stats():
+    try:
+        city_id = request.args.get('cityId', type=int)
+        country_id = request.args.get('countryId', type=int)
+        from_date = request.args.get('from')
+        until_date = request.args.get('until')
+        bucket = request.args.get('bucket', 'day')
+
+        if bucket not in STATS_BUCKETS:
+            return jsonify({"error": "Parametrul 'bucket' trebuie să fie hour, day sau month."}), 400
+        if city_id is not None and country_id is not None:
+            return jsonify({"error": "Specificați doar unul dintre 'cityId' și 'countryId'."}), 400
+
+        match = {}
+        if city_id is not None:
+            match["id_oras"] = city_id
+        if country_id is not None:
+            city_ids = list(country_city_ids(country_id))
+            if not city_ids:
+                return jsonify({"error": "Țara nu există sau nu are orașe asociate."}), 404
+            match["id_oras"] = {"$in": city_ids}
+
+        if from_date:
+            try:
+                from_date_parsed = datetime.strptime(from_date, "%Y-%m-%d")
+                match.setdefault("timestamp", {})["$gte"] = from_date_parsed
+            except ValueError:
+                return jsonify({"error": "Formatul datei nu este AAAA-LL-ZZ"}), 400
+
+        if until_date:
+            try:
+                until_date_parsed = datetime.strptime(until_date, "%Y-%m-%d")
+                match.setdefault("timestamp", {})["$lte"] = until_date_parsed
+            except ValueError:
+                return jsonify({"error": "Formatul datei nu este AAAA-LL-ZZ"}), 400
 
-        return jsonify(temperatures), 200
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {"$dateTrunc": {"date": "$timestamp", "unit": bucket}},
+                "count": {"$sum": 1},
+                "min": {"$min": "$valoare"},
+                "max": {"$max": "$valoare"},
+                "avg": {"$avg": "$valoare"},
+                "stddev": {"$stdDevPop": "$valoare"},
+            }},
+            {"$sort": {"_id": 1}},
+            {"$project": {"_id": 0, "bucket": "$_id", "count": 1, "min": 1, "max": 1, "avg": 1, "stddev": 1}},
+        ]
+        stats = list(db["Temperaturi"].aggregate(pipeline))
+
+        return jsonify(stats), 200
 
     except Exception as e:
         return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
+
+@app.route('/api/temperatures/summary', methods=["GET"])
+@conditional_get("Temperaturi", "Orase", historical=True)
+def get_temperature_summary():
+    try:
+        city_id = request.args.get('cityId', type=int)
+        country_id = request.args.get('countryId', type=int)
+        from_date = request.args.get('from')
+        until_date = request.args.get('until')
+        bucket = request.args.get('bucket', 'day')
+
+        if bucket not in STATS_BUCKETS:
+            return jsonify({"error": "Parametrul 'bucket' trebuie să fie hour, day sau month."}), 400
+        if (city_id is None) == (country_id is None):
+            return jsonify({"error": "Specificați exact unul dintre 'cityId' și 'countryId'."}), 400
+
+        match = {"granularity": "hour" if bucket == "hour" else "day"}
+        if city_id is not None:
+            match["id_oras"] = city_id
+        else:
+            city_ids = list(country_city_ids(country_id))
+            if not city_ids:
+                return jsonify({"error": "Țara nu există sau nu are orașe asociate."}), 404
+            match["id_oras"] = {"$in": city_ids}
+
+        if from_date:
+            try:
+                from_date_parsed = datetime.strptime(from_date, "%Y-%m-%d")
+                match.setdefault("bucket", {})["$gte"] = from_date_parsed
+            except ValueError:
+                return jsonify({"error": "Formatul datei nu este AAAA-LL-ZZ"}), 400
+
+        if until_date:
+            try:
+                until_date_parsed = datetime.strptime(until_date, "%Y-%m-%d")
+                match.setdefault("bucket", {})["$lte"] = until_date_parsed
+            except ValueError:
+                return jsonify({"error": "Formatul datei nu este AAAA-LL-ZZ"}), 400
+
+        group_key = "$bucket"
+        if bucket == "month":
+            group_key = {"$dateTrunc": {"date": "$bucket", "unit": "month"}}
+
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": group_key,
+                "count": {"$sum": "$count"},
+                "sum": {"$sum": "$sum"},
+                "min": {"$min": "$min"},
+                "max": {"$max": "$max"},
+            }},
+            {"$sort": {"_id": 1}},
+            {"$project": {
+                "_id": 0,
+                "bucket": "$_id",
+                "count": 1,
+                "min": 1,
+                "max": 1,
+                "avg": {"$divide": ["$sum", "$count"]},
+            }},
+        ]
+        summary = list(db["TemperatureRollups"].aggregate(pipeline))
+
+        return jsonify(summary), 200
+
+    except Exception as e:
+        return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
+
+def export_query(city_id, country_id, from_date, until_date):
+    if city_id is not None and country_id is not None:
+        raise QueryError("Specificați doar unul dintre 'cityId' și 'countryId'.")
+    query = {}
+    if city_id is not None:
+        query["id_oras"] = city_id
+    if country_id is not None:
+        query["id_oras"] = {"$in": list(country_city_ids(country_id))}
+    try:
+        if from_date:
+            query.setdefault("timestamp", {})["$gte"] = datetime.strptime(from_date, "%Y-%m-%d")
+        if until_date:
+            query.setdefault("timestamp", {})["$lte"] = datetime.strptime(until_date, "%Y-%m-%d")
+    except ValueError:
+        raise QueryError("Formatul datei nu este AAAA-LL-ZZ")
+    return query
+
+def export_batches(query):
+    cursor = db["Temperaturi"].find(query, {"_id": 0, "id_oras": 1, "timestamp": 1, "valoare": 1})
+    cursor = cursor.sort([("id_oras", ASCENDING), ("timestamp", ASCENDING)]).batch_size(export_batch_size)
+    columns = ([], [], [])
+    for document in cursor:
+        columns[0].append(document["id_oras"])
+        columns[1].append(document["timestamp"])
+        columns[2].append(document["valoare"])
+        if len(columns[0]) == export_batch_size:
+            yield columns
+            columns = ([], [], [])
+    if columns[0]:
+        yield columns
+
+def record_batch(columns):
+    return pyarrow.record_batch(
+        [pyarrow.array(values, type=field.type) for values, field in zip(columns, EXPORT_SCHEMA)],
+        schema=EXPORT_SCHEMA
+    )
+
+def export_chunks(query, format):
+    sink = io.BytesIO()
+
+    def drain():
+        chunk = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return chunk
+
+    if format == "csv":
+        text = io.TextIOWrapper(sink, encoding="utf-8", newline="", write_through=True)
+        writer = csv.writer(text)
+        writer.writerow(EXPORT_SCHEMA.names)
+        for ids, timestamps, values in export_batches(query):
+            writer.writerows(zip(ids, (timestamp.isoformat() for timestamp in timestamps), values))
+            yield drain()
+        yield drain()
+        return
+
+    if format == "arrow":
+        writer = pyarrow.ipc.new_stream(sink, EXPORT_SCHEMA)
+        for columns in export_batches(query):
+            writer.write_batch(record_batch(columns))
+            yield drain()
+    else:
+        writer = pyarrow.parquet.ParquetWriter(sink, EXPORT_SCHEMA)
+        for columns in export_batches(query):
+            writer.write_batch(record_batch(columns))
+            yield drain()
+    writer.close()
+    yield drain()
+
+def feed_available():
+    return temperatures_storage != "timeseries" and transactions_supported()
+
+def feed_filter(args):
+    city_id = args.get('cityId', type=int)
+    country_id = args.get('countryId', type=int)
+    if city_id is not None and country_id is not None:
+        raise QueryError("Specificați doar unul dintre 'cityId' și 'countryId'.")
+    return city_id, country_id
+
+def feed_messages(subscriber, last_event_id):
+    temperature_feed.subscribe(subscriber)
+    try:
+        last = None
+        if last_event_id:
+            for event in temperature_feed.catch_up(last_event_id, subscriber):
+                last = event["id"] or last
+                yield sse_message(event)
+        while not temperature_feed.stop_event.is_set():
+            if subscriber.overflowed and subscriber.queue.empty():
+                return
+            try:
+                event = subscriber.queue.get(timeout=feed_heartbeat)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if last is not None and event["id"] is not None and event["id"] <= last:
+                continue
+            yield sse_message(event)
+    finally:
+        temperature_feed.unsubscribe(subscriber)
+
+FEED_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+feed_slots = threading.BoundedSemaphore(feed_max_subscribers)
+
+@app.route('/api/temperatures/stream', methods=["GET"])
+def stream_temperatures():
+    try:
+        city_id, country_id = feed_filter(request.args)
+        if city_id is not None and not city_exists(city_id):
+            return jsonify({"error": "Orașul nu există."}), 404
+        if country_id is not None and not country_exists(country_id):
+            return jsonify({"error": "Țara nu există."}), 404
+        if not feed_available():
+            return jsonify({"error": "Fluxul live necesită un replica set MongoDB și o colecție Temperaturi obișnuită."}), 503
+
+        if not feed_slots.acquire(blocking=False):
+            response = jsonify({"error": "Prea mulți abonați la fluxul live; folosiți serverul ASGI (weather_app_async)."})
+            response.headers["Retry-After"] = str(int(feed_heartbeat) or 1)
+            return response, 503
+        try:
+            messages = feed_messages(FeedSubscriber(city_id, country_id), request.headers.get("Last-Event-ID"))
+            response = Response(stream_with_context(messages), status=200, mimetype="text/event-stream", headers=FEED_HEADERS)
+        except Exception:
+            feed_slots.release()
+            raise
+        response.call_on_close(feed_slots.release)
+        return response
+
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
+
+@app.route('/api/temperatures/export', methods=["GET"])
+@conditional_get("Temperaturi", "Orase", historical=True)
+def export_temperatures():
+    try:
+        format = request.args.get('format', 'csv')
+        if format not in EXPORT_FORMATS:
+            return jsonify({"error": "Parametrul 'format' trebuie să fie csv, arrow sau parquet."}), 400
+        query = export_query(
+            request.args.get('cityId', type=int),
+            request.args.get('countryId', type=int),
+            request.args.get('from'),
+            request.args.get('until'),
+        )
+        mimetype, extension = EXPORT_FORMATS[format]
+        response = Response(stream_with_context(export_chunks(query, format)), status=200, mimetype=mimetype)
+        response.headers["Content-Disposition"] = f"attachment; filename=temperaturi.{extension}"
+        return response
+
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
+
+@app.cli.command("init-db", help="Creează indexurile și contoarele; se rulează o singură dată înainte de pornire.")
+def init_db_command():
+    connect()
+    initialize_database()
+    click.echo("Baza de date a fost inițializată.")
+
+@app.cli.command("export-temperatures", help="Exportă Temperaturi în format csv, arrow sau parquet.")
+@click.option("--format", "format", type=click.Choice(list(EXPORT_FORMATS)), default="csv", show_default=True)
+@click.option("--output", type=click.Path(dir_okay=False, writable=True), required=True)
+@click.option("--city-id", type=int, default=None)
+@click.option("--country-id", type=int, default=None)
+@click.option("--from", "from_date", default=None)
+@click.option("--until", "until_date", default=None)
+def export_temperatures_command(format, output, city_id, country_id, from_date, until_date):
+    connect()
+    try:
+        query = export_query(city_id, country_id, from_date, until_date)
+    except QueryError as e:
+        raise click.ClickException(str(e))
+    with open(output, "wb") as file:
+        for chunk in export_chunks(query, format):
+            file.write(chunk)
+
+@app.cli.command("rebuild-rollups", help="Reconstruiește TemperatureRollups din Temperaturi.")
+@click.option("--city-id", type=int, default=None)
+def rebuild_rollups_command(city_id):
+    connect()
+    initialize_database()
+    rebuild_rollups(city_id)
+    bump_version("Temperaturi")
+    click.echo("TemperatureRollups a fost reconstruită.")
+
+@app.cli.command("migrate-timeseries", help="Mută Temperaturi într-o colecție time-series.")
+@click.option("--batch-size", default=10000, show_default=True)
+@click.option("--drop-legacy", is_flag=True)
+def migrate_timeseries(batch_size, drop_legacy):
+    connect()
+    collections = db.list_collection_names()
+    if "Temperaturi_legacy" in collections:
+        raise click.ClickException("Temperaturi_legacy există deja; o migrare anterioară nu a fost finalizată.")
+    if "Temperaturi" in collections and "timeseries" in db["Temperaturi"].options():
+        click.echo("Temperaturi este deja o colecție time-series.")
+        return
+
+    if "Temperaturi" in collections:
+        db["Temperaturi"].rename("Temperaturi_legacy")
+    create_temperatures_collection(True)
+    initialize_database()
+
+    if "Temperaturi" not in collections:
+        return
+
+    copied = 0
+    batch = []
+    for document in db["Temperaturi_legacy"].find({}, {"_id": 0}).batch_size(batch_size):
+        batch.append(document)
+        if len(batch) == batch_size:
+            db["Temperaturi"].insert_many(batch, ordered=False)
+            copied += len(batch)
+            batch = []
+            click.echo(f"{copied} temperaturi copiate.")
+    if batch:
+        db["Temperaturi"].insert_many(batch, ordered=False)
+        copied += len(batch)
+    bump_version("Temperaturi")
+    click.echo(f"Migrare finalizată: {copied} temperaturi copiate.")
+
+    if drop_legacy:
+        db["Temperaturi_legacy"].drop()
+
 if __name__ == "__main__":
+    create_app()
     initialize_database()
     app.run(host="0.0.0.0", port=8080)
\ No newline at end of file
@@ -0,0 +1,335 @@
+from quart import Quart, request, jsonify, Response, make_response, g
+from asgiref.wsgi import WsgiToAsgi
+from pymongo import AsyncMongoClient
+from werkzeug.exceptions import HTTPException
+from datetime import datetime
+import asyncio
+import functools
+import time
+
+import weather_app
+from weather_app import (
+    COUNTRY_FIELDS, CITY_FIELDS, TEMPERATURE_FIELDS, QueryError, metadata_cache,
+    prepare_page, temperature_sort_keys, encode_cursor, strip_document, parse_near, geo_point,
+    compute_etag, cache_control_header, OrjsonProvider,
+    FeedSubscriber, temperature_feed, feed_filter, feed_available, sse_message, FEED_HEADERS,
+    REQUEST_DURATION, REQUESTS_IN_FLIGHT,
+)
+
+app = Quart(__name__)
+app.json = OrjsonProvider(app, weather_app.json_datetime_format)
+client = None
+db = None
+
+wsgi_app = WsgiToAsgi(weather_app.app)
+
+@app.before_serving
+async def connect():
+    global client, db
+    client = AsyncMongoClient(
+        weather_app.uri,
+        maxPoolSize=weather_app.max_pool_size,
+        minPoolSize=weather_app.min_pool_size,
+        waitQueueTimeoutMS=weather_app.wait_queue_timeout_ms,
+        serverSelectionTimeoutMS=weather_app.server_selection_timeout_ms,
+        event_listeners=[weather_app.command_listener],
+    )
+    db = client[weather_app.database_name]
+    await asyncio.to_thread(weather_app.create_app)
+
+@app.after_serving
+async def disconnect():
+    await client.close()
+    await asyncio.to_thread(temperature_feed.stop)
+    await asyncio.to_thread(weather_app.cascade_sweeper.stop)
+    await asyncio.to_thread(weather_app.temperature_buffer.stop)
+
+@app.before_request
+async def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.route = request.url_rule.rule if request.url_rule else "unmatched"
+    REQUESTS_IN_FLIGHT.labels(g.route, request.method).inc()
+
+@app.after_request
+async def record_request_metrics(response):
+    elapsed = time.perf_counter() - g.request_started
+    REQUEST_DURATION.labels(g.route, request.method, response.status_code).observe(elapsed)
+    return response
+
+@app.teardown_request
+async def finish_request_metrics(exception):
+    if "route" in g:
+        REQUESTS_IN_FLIGHT.labels(g.route, request.method).dec()
+
+async def cached(key, loader, collection):
+    stamp = (await collection_versions([collection]))[0]
+    found, value = metadata_cache.lookup(key, stamp)
+    if found:
+        return value
+    value = await loader()
+    metadata_cache.store(key, value, stamp)
+    return value
+
+async def country_exists(id):
+    async def load():
+        return await db["Tari"].find_one({"id": id}, {"_id": 1}) is not None
+    return await cached(("country", id), load, "Tari")
+
+async def city_exists(id):
+    async def load():
+        return await db["Orase"].find_one({"id": id}, {"_id": 1}) is not None
+    return await cached(("city", id), load, "Orase")
+
+async def country_city_ids(id_tara):
+    async def load():
+        cursor = db["Orase"].find({"id_tara": id_tara}, {"_id": 0, "id": 1})
+        return tuple([city["id"] async for city in cursor])
+    return await cached(("country_cities", id_tara), load, "Orase")
+
+async def collection_versions(names):
+    now = time.monotonic()
+    with weather_app.versions_lock:
+        stale = [name for name in names if name not in weather_app.versions or weather_app.versions[name][1] <= now]
+    if stale:
+        fetched = {name: 0 for name in stale}
+        async for counter in db["versions"].find({"_id": {"$in": stale}}, {"version": 1}):
+            fetched[counter["_id"]] = counter.get("version", 0)
+        with weather_app.versions_lock:
+            for name, version in fetched.items():
+                weather_app.versions[name] = (version, now + weather_app.version_cache_ttl)
+    with weather_app.versions_lock:
+        return [weather_app.versions[name][0] for name in names]
+
+def conditional_get(*collections, historical=False):
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            try:
+                etag = compute_etag(
+                    collections, await collection_versions(collections),
+                    request.path, request.query_string.decode(), wants_stream()
+                )
+            except Exception:
+                app.logger.exception("Versiunile colecțiilor nu au putut fi citite.")
+                return await view(*args, **kwargs)
+
+            if etag in request.if_none_match:
+                response = Response("", status=304)
+            else:
+                response = await make_response(await view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = cache_control_header(request.args, historical)
+            response.vary.add("Accept")
+            return response
+        return wrapper
+    return decorator
+
+def wants_stream():
+    if request.args.get("stream") == "1":
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"])
+    return best == "application/x-ndjson"
+
+async def page_response(collection, query, mapping, sort_keys):
+    limit, pipeline, extra = prepare_page(query, mapping, sort_keys, request.args)
+
+    if wants_stream():
+        async def generate():
+            cursor = await db[collection].aggregate(pipeline, batchSize=weather_app.stream_batch_size)
+            async for document in cursor:
+                yield app.json.dumps_bytes(strip_document(document, extra)) + b"\n"
+        return Response(generate(), status=200, mimetype="application/x-ndjson")
+
+    documents = await (await db[collection].aggregate(pipeline)).to_list(None)
+    next_cursor = None
+    if limit and len(documents) == limit:
+        next_cursor = encode_cursor(documents[-1], sort_keys)
+    if extra:
+        documents = [strip_document(document, extra) for document in documents]
+    response = jsonify(documents)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response, 200
+
+async def temperatures_response(query):
+    return await page_response("Temperaturi", query, TEMPERATURE_FIELDS, temperature_sort_keys(query))
+
+def add_date_range(query, until_operator="$lte"):
+    from_date = request.args.get('from')
+    until_date = request.args.get('until')
+    try:
+        if from_date:
+            query.setdefault("timestamp", {})["$gte"] = datetime.strptime(from_date, "%Y-%m-%d")
+        if until_date:
+            query.setdefault("timestamp", {})[until_operator] = datetime.strptime(until_date, "%Y-%m-%d")
+    except ValueError:
+        raise QueryError("Formatul datei nu este AAAA-LL-ZZ")
+
+@app.errorhandler(QueryError)
+async def handle_query_error(e):
+    return jsonify({"error": str(e)}), 400
+
+@app.errorhandler(Exception)
+async def handle_error(e):
+    if isinstance(e, HTTPException):
+        return e
+    return jsonify({"error": f"Eroare internă: {str(e)}"}), 500
+
+@app.route('/api/countries', methods=["GET"])
+@conditional_get("Tari")
+async def get_countries():
+    return await page_response("Tari", {}, COUNTRY_FIELDS, ["id"])
+
+@app.route('/api/cities', methods=["GET"])
+@conditional_get("Orase")
+async def get_cities():
+    return await page_response("Orase", {}, CITY_FIELDS, ["id"])
+
+@app.route('/api/cities/country/<int:idTara>', methods=["GET"])
+@conditional_get("Tari", "Orase")
+async def get_cities_by_country(idTara):
+    exists, page = await asyncio.gather(
+        country_exists(idTara),
+        page_response("Orase", {"id_tara": idTara}, CITY_FIELDS, ["id"]),
+    )
+    if not exists:
+        return jsonify({"error": "Țara nu există."}), 404
+    return page
+
+@app.route('/api/temperatures', methods=["GET"])
+@conditional_get("Temperaturi", "Orase", historical=True)
+async def get_temperatures():
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    near = request.args.get('near')
+    radius_km = request.args.get('radiusKm', type=float)
+    nearest = request.args.get('nearest', type=int)
+
+    query = {}
+    add_date_range(query)
+
+    if near is not None:
+        near_lat, near_lon = parse_near(near)
+        if radius_km is not None and radius_km <= 0:
+            return jsonify({"error": "Parametrul 'radiusKm' trebuie să fie pozitiv."}), 400
+        if nearest is not None and nearest <= 0:
+            return jsonify({"error": "Parametrul 'nearest' trebuie să fie un număr întreg pozitiv."}), 400
+        if radius_km is None and nearest is None:
+            nearest = 1
+
+        geo_near = {"near": geo_point(near_lat, near_lon), "distanceField": "distanta", "spherical": True, "key": "locatie"}
+        if radius_km is not None:
+            geo_near["maxDistance"] = radius_km * 1000
+        pipeline = [{"$geoNear": geo_near}]
+        if nearest is not None:
+            pipeline.append({"$limit": nearest})
+        pipeline.append({"$project": {"_id": 0, "id": 1}})
+        cursor = await db["Orase"].aggregate(pipeline)
+        city_ids = [city["id"] async for city in cursor]
+        if not city_ids:
+            return jsonify({"error": "Nu există orașe pentru coordonatele specificate."}), 404
+        query["id_oras"] = {"$in": city_ids}
+
+    elif lat is not None or lon is not None:
+        city_query = {}
+        if lat is not None:
+            city_query["latitudine"] = lat
+        if lon is not None:
+            city_query["longitudine"] = lon
+        city_ids = [city["id"] async for city in db["Orase"].find(city_query, {"_id": 0, "id": 1})]
+        if not city_ids:
+            return jsonify({"error": "Nu există orașe pentru coordonatele specificate."}), 404
+        query["id_oras"] = {"$in": city_ids}
+
+    return await temperatures_response(query)
+
+@app.route('/api/temperatures/cities/<int:id_oras>', methods=["GET"])
+@conditional_get("Temperaturi", historical=True)
+async def get_temperatures_by_city(id_oras):
+    query = {"id_oras": id_oras}
+    add_date_range(query)
+    return await temperatures_response(query)
+
+@app.route('/api/temperatures/countries/<int:id_tara>', methods=["GET"])
+@conditional_get("Temperaturi", "Orase", historical=True)
+async def get_temperatures_by_country(id_tara):
+    query = {}
+    add_date_range(query, "$lt")
+    city_ids = list(await country_city_ids(id_tara))
+    if not city_ids:
+        return jsonify({"error": "Țara nu există sau nu are orașe asociate."}), 404
+    query["id_oras"] = {"$in": city_ids}
+    return await temperatures_response(query)
+
+class AsyncFeedSubscriber(FeedSubscriber):
+    def __init__(self, city_id=None, country_id=None):
+        super().__init__(city_id, country_id)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=weather_app.feed_queue_size)
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self.put, event)
+
+    def put(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+async def feed_messages(subscriber, last_event_id):
+    temperature_feed.subscribe(subscriber)
+    try:
+        last = None
+        if last_event_id:
+            for event in await asyncio.to_thread(temperature_feed.catch_up, last_event_id, subscriber):
+                last = event["id"] or last
+                yield sse_message(event)
+        while not temperature_feed.stop_event.is_set():
+            if subscriber.overflowed and subscriber.queue.empty():
+                return
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), weather_app.feed_heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if last is not None and event["id"] is not None and event["id"] <= last:
+                continue
+            yield sse_message(event)
+    finally:
+        temperature_feed.unsubscribe(subscriber)
+
+@app.route('/api/temperatures/stream', methods=["GET"])
+async def stream_temperatures():
+    city_id, country_id = feed_filter(request.args)
+    if city_id is not None and not await city_exists(city_id):
+        return jsonify({"error": "Orașul nu există."}), 404
+    if country_id is not None and not await country_exists(country_id):
+        return jsonify({"error": "Țara nu există."}), 404
+    if not await asyncio.to_thread(feed_available):
+        return jsonify({"error": "Fluxul live necesită un replica set MongoDB și o colecție Temperaturi obișnuită."}), 503
+
+    messages = feed_messages(AsyncFeedSubscriber(city_id, country_id), request.headers.get("Last-Event-ID"))
+    response = Response(messages, status=200, mimetype="text/event-stream", headers=FEED_HEADERS)
+    response.timeout = None
+    return response
+
+url_adapter = app.url_map.bind("localhost")
+
+def handled_async(scope):
+    if scope["type"] != "http":
+        return True
+    try:
+        url_adapter.match(scope["path"], method=scope["method"])
+    except HTTPException:
+        return False
+    return True
+
+async def application(scope, receive, send):
+    if handled_async(scope):
+        await app(scope, receive, send)
+    else:
+        await wsgi_app(scope, receive, send)